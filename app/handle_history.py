@@ -13,6 +13,7 @@ Behaviour details and design notes are provided inline below.
 from ui.layout_history import show_history_list, show_measurement_detail, show_back_menu
 from core.utils import is_encoder_pressed
 from history.history_utils import load_history
+from ucollections import deque
 import time
 
  
@@ -27,9 +28,9 @@ def handle_history(encoder):
 
     High-level steps:
     1. Load all history entries from persistent storage via `load_history()`.
-    2. Filter out invalid or empty measurements (for example entries with
-       `mean_hr` <= 0) because these are not useful to display.
-    3. Keep up to the last 5 valid entries (most recent) and show them.
+    2. In a single pass, filter out invalid or empty measurements (for
+       example entries with `mean_hr` <= 0) and keep only the last 5 valid
+       entries (most recent) in a bounded deque, then show them.
     4. Allow the user to rotate the encoder to change the selection index.
     5. If the encoder button is pressed, show the detail view for the
        currently selected measurement and present a small back menu that
@@ -49,19 +50,21 @@ def handle_history(encoder):
       CPU usage and debounce mechanical input.
     """
 
-    # Load stored history records. The format and structure of the returned
-    # list are defined by `history.history_utils.load_history` (commonly a
-    # list of dicts where each dict contains measurement metadata).
-    history = load_history()
-    
-    # Filter out entries that are not real measurements. This example filters
-    # using `mean_hr` (mean heart rate) which is expected to be > 0 for valid
-    # records. The default value 0 is used when the key is missing.
-    valid_history = [entry for entry in history if entry.get("mean_hr", 0) > 0]
-
-    # Keep only the most recent five measurements so the UI is concise and
-    # fits on small displays. Negative slicing gracefully handles shorter lists.
-    recent_history = valid_history[-5:]
+    # Walk the stored history records once. The format and structure of the
+    # records are defined by `history.history_utils.load_history` (commonly
+    # a list of dicts where each dict contains measurement metadata).
+    #
+    # Entries that are not real measurements are skipped using `mean_hr`
+    # (mean heart rate), which is expected to be > 0 for valid records; the
+    # default value 0 is used when the key is missing. Valid entries go into
+    # a deque capped at five items, which silently drops the oldest entry
+    # once full, so only the most recent five measurements are kept without
+    # building an intermediate filtered list.
+    recent = deque((), 5)
+    for entry in load_history():
+        if entry.get("mean_hr", 0) > 0:
+            recent.append(entry)
+    recent_history = list(recent)
 
     # If no valid history exists, show an empty list placeholder and briefly
     # pause so the user can read the message, then return back to the caller
@@ -16,11 +16,9 @@ the UI and sampling loop until the measurement period ends.
 """
 
 from ui.layout_hr import show_start_instruction, show_hr_screen
-from ui.layout_animations import draw_ecg_frame
-from core.hrm import calibrate_threshold, read_live_signal, calculate_bpm
-from core.utils import is_encoder_pressed, encoder_button
-import time
-from core.adc_sampler import start_sampling
+from app.hr_sampling import collect_intervals
+from core.hrm import get_threshold, calculate_bpm
+from core.utils import wait_for_click
 from machine import Pin
 
 led = Pin("LED", Pin.OUT)
@@ -38,100 +36,47 @@ def handle_measure_hr(encoder):
     Flow:
     1. Show instructions telling the user how to position sensors and press
        the encoder button to start.
-    2. Wait for the user to press the encoder (debounced using short sleeps).
-    3. Calibrate the signal threshold using `calibrate_threshold()` which
-       should examine the current signal and choose a detection threshold.
-    4. Sample the live signal in a tight loop for 30 seconds:
-       - Use `read_live_signal(threshold)` to obtain raw sample values and a
-         boolean `beat` indicating whether a beat was detected at that sample.
-       - Maintain a sliding window `buffer` of the most recent 128 samples
-         for plotting an ECG-like frame.
-       - Track timestamps of beat events and compute valid inter-beat
-         intervals (in milliseconds) for BPM calculation; intervals outside
-         a plausible range (250 ms to 2000 ms) are ignored.
-       - Continuously estimate BPM over the last few intervals using
-         `calculate_bpm(...)` and render the ECG frame with `draw_ecg_frame`.
+    2. Wait for the user to click the encoder (see `wait_for_click`).
+    3. Get the `(thr_on, thr_off)` hysteresis thresholds for beat
+       detection with `get_threshold()`, which calibrates on the current
+       signal the first time and reuses that result afterwards.
+    4. Sample the live signal for 30 seconds with `collect_intervals`,
+       paced by the PIO sampler:
+       - Use `read_live_signal(thr_on, thr_off)` to obtain raw sample values
+         and a boolean `beat` indicating whether a beat started at that sample.
+       - Maintain a ring buffer `buffer` of the most recent 128 samples
+         for plotting an ECG-like frame; `widx` is the next slot to write
+         (and therefore the oldest sample when drawing).
+       - Remember the timestamp of the last beat and compute valid
+         inter-beat intervals (in milliseconds) for BPM calculation;
+         intervals outside a plausible range (250 ms to 2000 ms) are ignored.
+       - Re-estimate BPM over the last few intervals using
+         `calculate_bpm(...)` only when a beat arrives, and render the ECG
+         frame with `draw_ecg_frame` at most every 100 ms (~10 Hz).
     5. After the 30s measurement window finishes, compute the final BPM
        from all collected intervals and show the summarized heart rate screen.
 
     Timing and units:
     - `time.ticks_ms()` and `time.ticks_diff()` are used for millisecond
       resolution timing compatible with MicroPython timing helpers.
-    - The measurement window uses 30_000 ms (30 seconds) as the active
-      sampling period.
+    - The measurement window uses DURATION_MS (30 seconds, see
+      `app.hr_sampling`) as the active sampling period.
     """
 
     # Show starting instructions to the user (how to prepare for the test).
     show_start_instruction()
 
-    # Wait until the encoder button is pressed to begin the measurement. The
-    # `is_encoder_pressed()` helper abstracts the higher-level check while
-    # the `encoder_button.value()` raw pin read is used below to wait for the
-    # button state to settle. Short sleeps provide a simple debounce.
-    while not is_encoder_pressed():
-        time.sleep(0.05)
-    while encoder_button.value() == 0:
-        time.sleep(0.05)
+    # Wait until the encoder button is clicked (pressed and released) to
+    # begin the measurement. `wait_for_click()` debounces the edges itself.
+    wait_for_click()
     
-    start_sampling()
-    # Calibrate a threshold for beat detection. The implementation should
-    # examine current signal characteristics (e.g. noise level) and return
-    # a numeric threshold value appropriate for `read_live_signal`.
-    threshold = calibrate_threshold()
+    # Calibrate the beat detection thresholds. The implementation examines
+    # current signal characteristics and returns the `(thr_on, thr_off)`
+    # pair expected by `read_live_signal`.
+    thresholds = get_threshold()
 
-    # Buffer to store recent raw values for plotting. Keep at most 128
-    # samples to bound memory usage on embedded devices.
-    buffer = []
-
-    # `intervals` stores valid inter-beat intervals (ms) used for BPM
-    # calculation. `beats` stores raw timestamped beat events and is used to
-    # compute intervals incrementally.
-    intervals = []
-    beats = []
-
-    # Mark the start time (ms) of the measurement window.
-    start_time = time.ticks_ms()
-
-    # Active sampling loop: run until 30 seconds have elapsed since start.
-    while time.ticks_diff(time.ticks_ms(), start_time) < 30_000:
-        # Read a single live sample and whether a beat has been detected at
-        # this sample given the calibrated threshold.
-        value, beat = read_live_signal(threshold)
-
-        # Append the newest sample to the sliding buffer and drop the oldest
-        # sample if buffer exceeds the display capacity.
-        buffer.append(value)
-        if len(buffer) > 128:
-            buffer.pop(0) 
-
-        # If a beat was detected, timestamp it and compute the interval to
-        # the previous beat. Only intervals within a plausible physiological
-        # range are kept to avoid corrupting BPM calculations with noise.
-        if beat:
-            led.toggle()
-            now = time.ticks_ms()
-            beats.append(now)
-            if len(beats) > 1:
-                interval = time.ticks_diff(beats[-1], beats[-2])
-                # Accept intervals between approximately 250 ms (240 bpm)
-                # and 2000 ms (30 bpm). Adjust these bounds if your device
-                # or population requires different limits.
-                if 250 < interval < 2000:
-                    intervals.append(interval)
-
-        # Continuously compute a short-term BPM estimate using the last few
-        # intervals (for example the last 5) so the UI shows a responsive
-        # value while the measurement proceeds.
-        bpm = calculate_bpm(intervals[-5:])
-
-        # Compute remaining time in seconds for the 30s window and draw the
-        # ECG frame with the buffer, remaining time, and current BPM.
-        time_left = 30 - time.ticks_diff(time.ticks_ms(), start_time) // 1000
-        draw_ecg_frame(buffer, time_left, bpm)
-
-        # Small sleep to pace sampling and avoid hogging CPU — adjust as
-        # necessary for your sampling rate and responsiveness requirements.
-        time.sleep(0.01)
+    # Sample for the 30 s window, blinking the LED on each detected beat.
+    intervals, _ = collect_intervals(thresholds, on_beat=led.toggle)
 
     # After the sampling window ends, compute the final BPM using all
     # collected intervals and show the result screen to the user.
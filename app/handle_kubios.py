@@ -3,6 +3,6 @@ from core.menu import get_menu_items, get_current_selection
 from ui.layout_menu import show_menu
 
 
-def handle_kubios():
-    kubios_analysis()
+async def handle_kubios():
+    await kubios_analysis()
     show_menu(get_menu_items(), get_current_selection())
\ No newline at end of file
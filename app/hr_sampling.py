@@ -0,0 +1,132 @@
+"""
+Shared heart rate sampling loop.
+
+Both the heart rate and the basic HRV flows collect inter-beat intervals
+the same way: sample the live signal for a fixed window, keep the most
+recent samples in a ring buffer for the ECG display, estimate a short-term
+BPM whenever a beat arrives and redraw the screen at a throttled rate.
+`collect_intervals` implements that loop once so the handlers only deal
+with what happens before and after the measurement.
+"""
+
+from ui.layout_animations import draw_ecg_frame, reset_ecg_header
+from ui.oled import WIDTH
+from core.hrm import read_live_signal, calculate_bpm, push_sample, beat_interval
+from core.adc_sampler import start_sampling, stop_sampling
+from micropython import const
+import time
+import array
+
+# Length of the measurement window (ms).
+DURATION_MS = const(30_000)
+
+# Minimum time between two ECG redraws (ms). The OLED cannot usefully show
+# more than ~10 frames per second, while samples arrive much faster.
+DRAW_INTERVAL_MS = 100
+
+# Upper bound on stored intervals: 30 s at 240 bpm is 120 beats, so 256
+# leaves ample headroom while keeping the array size bounded.
+MAX_INTERVALS = 256
+
+# Number of most recent intervals averaged for the live BPM readout.
+BPM_WINDOW = 5
+
+
+def collect_intervals(thresholds, duration_ms=DURATION_MS, draw=draw_ecg_frame,
+                      on_beat=None):
+    """
+    Sample the live signal for `duration_ms` and collect beat intervals.
+
+    Args:
+        thresholds: `(thr_on, thr_off)` from `get_threshold()`.
+        duration_ms: Length of the measurement window in milliseconds.
+        draw: Frame renderer called as
+              `draw(buffer, widx, time_left, bpm)` at most every
+              DRAW_INTERVAL_MS. It returns True when the frame was sent;
+              a False result is retried on the next sample.
+        on_beat: Optional callable invoked without arguments on every
+                 detected beat (e.g. to blink an LED).
+
+    Returns:
+        (intervals, buffer): an `array('H')` of valid inter-beat intervals
+        in milliseconds and the WIDTH-sample ring buffer of raw values.
+
+    Sampling is paced by the PIO sampler through `read_live_signal`, so the
+    loop does not sleep. Intervals outside the 250-2000 ms range are ignored
+    (see `beat_interval`) and at most MAX_INTERVALS are stored.
+    """
+
+    # Ring buffer of recent raw values for plotting; `widx` is the next
+    # slot to write and therefore the oldest sample when drawing.
+    buffer = array.array('H', [0] * WIDTH)
+    widx = 0
+
+    # Valid inter-beat intervals (ms) and the timestamp of the previous
+    # beat (None until the first beat).
+    intervals = array.array('H')
+    last_beat = None
+
+    # Fixed window holding the last BPM_WINDOW accepted intervals for the
+    # live BPM estimate. `wpos` is the next slot to overwrite and `wcount`
+    # how many slots are filled.
+    window = array.array('H', [0] * BPM_WINDOW)
+    wpos = 0
+    wcount = 0
+
+    # Short-term BPM shown on screen; only changes when a beat arrives.
+    bpm = 0
+
+    # Bind the functions used on every sample to locals: a local load is a
+    # single opcode, while a global or attribute load is a dict lookup.
+    ticks_ms = time.ticks_ms
+    ticks_diff = time.ticks_diff
+    ticks_add = time.ticks_add
+    read = read_live_signal
+    thr_on, thr_off = thresholds
+    push = push_sample
+
+    # The first frame must repaint the whole screen, header included.
+    reset_ecg_header()
+
+    start_time = ticks_ms()
+    end_time = ticks_add(start_time, duration_ms)
+    next_draw = start_time
+
+    # The PIO sampler only runs for the measurement window; stopping it
+    # afterwards lets the idle menu sleep without the 100 Hz interrupt.
+    start_sampling()
+    try:
+        while ticks_diff(end_time, ticks_ms()) > 0:
+            value, beat = read(thr_on, thr_off)
+
+            # Overwrite the oldest slot of the ring buffer with the newest sample.
+            widx = push(buffer, widx, value)
+
+            if beat:
+                if on_beat is not None:
+                    on_beat()
+                now = ticks_ms()
+                if last_beat is not None:
+                    interval = beat_interval(now, last_beat)
+                    if interval and len(intervals) < MAX_INTERVALS:
+                        intervals.append(interval)
+                        window[wpos] = interval
+                        wpos = (wpos + 1) % BPM_WINDOW
+                        if wcount < BPM_WINDOW:
+                            wcount += 1
+                        bpm = calculate_bpm(window, wcount)
+                last_beat = now
+
+            # Redraw once the deadline has passed, showing the remaining time in
+            # whole seconds (rounded up).
+            now = ticks_ms()
+            if ticks_diff(now, next_draw) >= 0:
+                time_left = (ticks_diff(end_time, now) + 999) // 1000
+                # Only a frame that was sent re-arms the deadline; one skipped
+                # because the display was busy is retried on the next sample.
+                if draw(buffer, widx, time_left, bpm):
+                    next_draw = ticks_add(now, DRAW_INTERVAL_MS)
+    finally:
+        stop_sampling()
+
+    return intervals, buffer
@@ -1,4 +1,4 @@
-from core.utils import is_encoder_pressed, encoder_button
+from core.input_events import wait_for_press
 from core.hrm import calibrate_threshold, pulse_sensor
 from ui.layout_hr import show_start_instruction, show_hr_screen
 from ui.layout_common import show_error_screen, show_sending_screen
@@ -22,7 +22,6 @@ import ujson
 import core.wifi_mqtt as wifi
 from cloud.kubios_utils import format_kubios_payload, handle_kubios_response
 
-
 def collect_ppi_data(duration=30):
     """
     Collect P-P (peak-to-peak) intervals using the ECG animation.
@@ -38,32 +37,49 @@ def collect_ppi_data(duration=30):
     return intervals
 
 
-def wait_for_encoder_press():
+async def wait_for_encoder_press():
     """
     Show start instructions and wait for the user to press the encoder button.
 
-    Debounces the button to avoid multiple triggers.
+    The press is signalled by the button IRQ (see `core.input_events`), so
+    nothing runs between the prompt and the press.
     """
     show_start_instruction()
-    while not is_encoder_pressed():
-        time.sleep(0.05)
-    while encoder_button.value() == 0:
-        time.sleep(0.05)
+    await wait_for_press()
 
 
-def setup_wifi_and_mqtt():
+def setup_wifi_and_mqtt(mqtt_ready=False):
     """
     Connect to Wi-Fi and initialize the MQTT client.
 
+    Wi-Fi is only joined when the station is not already associated, and
+    the MQTT client is only created when `mqtt_ready` is False (or Wi-Fi
+    had to be rejoined), so retries skip the slow scan + DHCP and broker
+    handshake.
+
+    Args:
+        mqtt_ready (bool): True if this analysis session already holds a
+                           working MQTT connection.
+
+    Returns:
+        bool: True once Wi-Fi and MQTT are up.
+
     Raises:
-        Exception: If Wi-Fi connection fails.
+        Exception: If the Wi-Fi or MQTT connection fails.
     """
-    if not wifi.connect_wifi(WIFI_SSID, WIFI_PASSWORD):
-        raise Exception("WiFi not connected")
-    wifi.connect_mqtt()
+
+    if not network.WLAN(network.STA_IF).isconnected():
+        if not wifi.connect_wifi(WIFI_SSID, WIFI_PASSWORD):
+            raise Exception("WiFi not connected")
+        mqtt_ready = False
+
+    if not mqtt_ready:
+        if not wifi.connect_mqtt():
+            raise Exception("MQTT not connected")
+    return True
 
 
-def kubios_analysis():
+async def kubios_analysis():
     """
     Main flow for Kubios HRV analysis:
 
@@ -74,48 +90,52 @@ def kubios_analysis():
     5. Connect to Wi-Fi and send the payload via MQTT.
     6. Wait for Kubios results and handle the response.
     7. If any step fails, show an error screen with retry/exit options.
+
+    Retries restart the loop instead of calling this function recursively,
+    so repeated failures do not grow the call stack. The MQTT session is
+    only reused across retries of this call; a new analysis reconnects, as
+    a connection left from an earlier one may have gone stale.
     """
-    try:
-        wait_for_encoder_press()
+    mqtt_ready = False
 
-        intervals = collect_ppi_data(duration=30)
+    while True:
+        try:
+            await wait_for_encoder_press()
 
-        if len(intervals) < 5:
-            # Not enough data for analysis – show error and exit
-            show_error_screen()
-            return
+            intervals = collect_ppi_data(duration=30)
 
-        # Format collected data into Kubios-compatible format
-        payload = format_kubios_payload(intervals)
-
-        # Show "sending" animation and pause briefly
-        show_sending_screen()
-        time.sleep(1)
-
-        # Establish Wi-Fi and MQTT connection
-        setup_wifi_and_mqtt()
-
-        # Publish the request to the Kubios server
-        publish_json("kubios/request", intervals)
-
-        # Wait for Kubios to send back analysis results
-        result = wait_for_kubios_result()
-
-        if result:
-            # If response received, handle and display it
-            handle_kubios_response(result)
-        else:
-            # Timeout or no response – ask user to retry or exit
-            user_choice = show_error_screen()
-            if user_choice == "retry":
-                kubios_analysis()
-            elif user_choice == "exit":
-                show_menu(get_menu_items(), get_current_selection())
-
-    except Exception:
-        # Any unexpected exception – allow user to retry or exit
-        user_choice = show_error_screen()
-        if user_choice == "retry":
-            kubios_analysis()
-        elif user_choice == "exit":
+            if len(intervals) < 5:
+                # Not enough data for analysis – show error and exit
+                show_error_screen()
+                return
+
+            # Format collected data into Kubios-compatible format
+            payload = format_kubios_payload(intervals)
+
+            # Show "sending" animation and pause briefly
+            show_sending_screen()
+            time.sleep(1)
+
+            # Establish Wi-Fi and MQTT connection
+            mqtt_ready = setup_wifi_and_mqtt(mqtt_ready)
+
+            # Publish the request to the Kubios server
+            publish_json("kubios/request", intervals)
+
+            # Wait for Kubios to send back analysis results
+            result = wait_for_kubios_result()
+
+            if result:
+                # If response received, handle and display it
+                handle_kubios_response(result)
+                return
+
+        except Exception:
+            # Any unexpected exception – drop the MQTT session so the retry
+            # reconnects, then fall through to retry/exit below
+            mqtt_ready = False
+
+        # Timeout, no response or unexpected error – ask user to retry or exit
+        if show_error_screen() != "retry":
             show_menu(get_menu_items(), get_current_selection())
+            return
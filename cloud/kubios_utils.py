@@ -1,22 +1,27 @@
 from core.config import MAC_ADDRESS
-from ui.layout_hrv import show_kubios_results
 
 from ui.layout_menu import show_menu
 from core.menu import get_menu_items, get_current_selection
 from ui.layout_common import show_error_screen
 
 
-from core.utils import is_encoder_pressed, encoder_button
+from core.utils import wait_for_click
 from ui.layout_hrv import show_kubios_results
 from history.history_utils import save_to_history
-import time
+from micropython import const
+
+# Set to 1 to print every Kubios response over the serial console. With 0
+# the compiler drops the `if _DEBUG:` block.
+_DEBUG = const(0)
+
+# The device MAC never changes at runtime, so strip the colons only once.
+_MAC_NO_COLONS = MAC_ADDRESS.replace(":", "")
 
 
 def format_kubios_payload(ppi_list):
-    mac_no_colons = MAC_ADDRESS.replace(":", "")
     return {
         "type": "RRI",
-        "mac": mac_no_colons,
+        "mac": _MAC_NO_COLONS,
         "data": ppi_list,
         "analysis": {
             "type": "readiness"
@@ -25,7 +30,8 @@ def format_kubios_payload(ppi_list):
 
 def handle_kubios_response(result):
     try:
-        print("[DEBUG] handle_kubios_response() called with:", result)
+        if _DEBUG:
+            print("[DEBUG] handle_kubios_response() called with:", result)
 
         display_data = {
             "mean_hr": result["mean_hr"],
@@ -48,10 +54,7 @@ def handle_kubios_response(result):
         )
 
         # Ожидание кнопки
-        while not is_encoder_pressed():
-            time.sleep(0.05)
-        while encoder_button.value() == 0:
-            time.sleep(0.05)
+        wait_for_click()
 
         show_menu(get_menu_items(), get_current_selection())
 
@@ -1,26 +1,84 @@
 from machine import ADC, Pin
+from micropython import const
+import machine
+import array
 import rp2
 
 adc = ADC(Pin(26))  
 
+# Rate (Hz) at which the PIO program releases sample slots. One pass of the
+# `sampler` loop takes 35 PIO cycles (32 for the delayed nop, one each for
+# push, irq and jmp), so the state machine clock is derived from this rate.
+SAMPLE_RATE_HZ = const(100)
+_CYCLES_PER_SAMPLE = const(35)
+
+# Ring of samples filled by the PIO IRQ and drained by `read_sample` /
+# `drain`. `_head` is the next slot the IRQ writes, `_tail` the next slot
+# to read; the ring is empty when they are equal. Size must be a power of
+# two so the index wrap is a single mask.
+_RING_SIZE = const(64)
+_RING_MASK = const(63)
+_ring = array.array('H', [0] * _RING_SIZE)
+_head = 0
+_tail = 0
+
 @rp2.asm_pio()
 def sampler():
     label("loop")
     nop()       [31]     
     push()
+    irq(rel(0))
     jmp("loop")
 
-sm = rp2.StateMachine(0, sampler, freq=2_000_000) 
+sm = rp2.StateMachine(0, sampler, freq=SAMPLE_RATE_HZ * _CYCLES_PER_SAMPLE) 
+
+def _on_sample(_sm):
+    # Hard IRQ raised by the PIO once per sample slot: pop the slot marker
+    # so the PIO never stalls on a full RX FIFO, then store one ADC reading.
+    # When the consumer has fallen a full ring behind, the newest sample is
+    # dropped rather than overwriting unread ones.
+    global _head
+    sm.get()
+    nxt = (_head + 1) & _RING_MASK
+    if nxt != _tail:
+        _ring[_head] = adc.read_u16()
+        _head = nxt
+
+sm.irq(_on_sample, hard=True)
 
 def start_sampling():
+    # Starting (or restarting) discards whatever is left in the ring, so
+    # readers only see samples taken after this call. Safe to call while
+    # already running.
+    global _head, _tail
+    _tail = _head
     sm.active(1)
 
 def stop_sampling():
     sm.active(0)
 
 def read_sample():
-    if sm.rx_fifo():
-        _ = sm.get()  
-        value = adc.read_u16()
-        return value
-    return None
+    # Wait for the next sample from the ring, so callers are paced at
+    # SAMPLE_RATE_HZ by hardware instead of sleeping between reads.
+    # `machine.idle()` sleeps until the next interrupt (normally the PIO
+    # one). Sampling must have been started with `start_sampling()`.
+    global _tail
+    while _tail == _head:
+        machine.idle()
+    value = _ring[_tail]
+    _tail = (_tail + 1) & _RING_MASK
+    return value
+
+def drain(buf, n):
+    # Copy up to `n` already buffered samples into `buf` (oldest first)
+    # without waiting, and return how many were copied.
+    global _tail
+    count = 0
+    tail = _tail
+    head = _head
+    while count < n and tail != head:
+        buf[count] = _ring[tail]
+        tail = (tail + 1) & _RING_MASK
+        count += 1
+    _tail = tail
+    return count
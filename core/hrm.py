@@ -7,15 +7,34 @@ intended to be simple and efficient for use in embedded measurement flows.
 
 Provided functions:
 - `calibrate_threshold(calibration_time_ms=2000)`: sample the sensor for a
-  short period and determine a threshold for beat detection.
+  short period and determine the `(thr_on, thr_off)` hysteresis thresholds
+  for beat detection.
+- `get_threshold(force=False)`: return the thresholds of the last
+  calibration, calibrating only when there is none yet or `force` is set;
+  `reset_threshold()` drops them so the next call recalibrates.
 - `measure_intervals(duration_sec=10)`: perform a blocking interval
   measurement for `duration_sec` seconds and return cleaned inter-beat
   intervals in milliseconds.
-- `calculate_bpm(intervals)`: compute a BPM (beats per minute) value from
-  a list of inter-beat intervals (ms).
-- `read_live_signal(threshold)`: read a single sample and detect whether a
-  beat occurred crossing the provided threshold; useful for live plotting
-  and immediate beat detection during measurement.
+- `calculate_bpm(intervals, count=None)`: compute a BPM (beats per minute)
+  value from a sequence of inter-beat intervals (ms).
+- `read_live_signal(thr_on, thr_off)`: read a single sample and detect
+  whether a beat started at it; useful for live plotting and immediate
+  beat detection during measurement.
+- `push_sample(buf, widx, value)`: store a sample in a 128-slot ring buffer
+  (viper-compiled) and return the next write index.
+- `beat_interval(now, last_beat)`: return the interval between two beat
+  timestamps if it is plausible, else 0 (native-compiled).
+
+Calibration captures a block of samples and reduces it with the
+viper-compiled `_minmax`, and the sampling loop of `measure_intervals`
+runs in the viper-compiled `_detect_beats`, so the min/max tracking and
+threshold compare use machine-word integers instead of boxed Python ints.
+
+Beat detection uses two thresholds (a Schmitt trigger): a beat starts when
+the signal rises above `thr_on` (75% of the calibrated range) and the
+detector only re-arms once the signal has fallen below `thr_off` (50%).
+Noise around a single threshold therefore no longer produces several
+beats per pulse.
 
 Notes and assumptions:
 - The ADC returns 16-bit values via `read_u16()`; adjust scaling if your
@@ -25,50 +44,199 @@ Notes and assumptions:
 """
 
 from machine import Pin, ADC
+from micropython import const
+import micropython
 import time
-from core.adc_sampler import read_sample
+import array
+from core.adc_sampler import read_sample, start_sampling, stop_sampling, SAMPLE_RATE_HZ
 
 # ADC pin used for the pulse/PPG sensor. Change this constant to match your
 # board wiring. The code assumes the ADC supports `read_u16()` returning a
 # 0..65535 range (MicroPython typical behaviour on many ports).
-PULSE_SENSOR_PIN = 26
+PULSE_SENSOR_PIN = const(26)
 pulse_sensor = ADC(Pin(PULSE_SENSOR_PIN))
 
-# Internal state used by `read_live_signal` to detect rising-edge crossings.
-_last_value = 0
+# Internal state used by `read_live_signal`: True between a detected beat
+# (signal above `thr_on`) and the signal falling back below `thr_off`.
+_beat_state = False
+
+# Skip distance of `read_live_signal` (1/32 of the calibrated range) and the
+# last sample that reached its threshold tests.
+_live_eps = 0
+_live_last = 0
+
+# Plausible inter-beat interval range (ms): 250 ms is 240 bpm, 2000 ms is
+# 30 bpm. As `const()` names they compile to literal loads.
+_MIN_RR = const(250)
+_MAX_RR = const(2000)
+
+# Index mask for the live ECG ring buffer (128 samples, one per OLED column).
+# `RING_MASK` is the public alias for code outside this module.
+_RING_MASK = const(127)
+RING_MASK = _RING_MASK
+
+# Ring of the last beat timestamps seen by `measure_intervals`, allocated
+# once at import so a measurement never allocates per beat. `_WINDOW_HEAD`
+# is the next slot to write and `_WINDOW_COUNT` how many slots are valid.
+_WINDOW_SIZE = const(20)
+_WINDOW = array.array('I', [0] * _WINDOW_SIZE)
+_WINDOW_HEAD = 0
+_WINDOW_COUNT = 0
+
+# Parameters of `_detect_beats`: thr_on, thr_off and the skip distance eps.
+_DETECT_PARAMS = array.array('H', [0, 0, 0])
+
+# Capture buffer for calibration windows, allocated once at import. At the
+# sampler rate of 100 Hz it holds up to 10 s of samples.
+_CAL_SAMPLES = const(1000)
+_CAL_BUF = array.array('H', [0] * _CAL_SAMPLES)
+
+
+@micropython.viper
+def _minmax(buf: ptr16, n: int) -> uint:
+    """
+    Return the minimum and maximum of the first `n` entries of `buf` packed
+    as `(max << 16) | min`.
+    """
+    lo = 65535
+    hi = 0
+    for i in range(n):
+        v = int(buf[i])
+        if v < lo:
+            lo = v
+        if v > hi:
+            hi = v
+    return uint((hi << 16) | lo)
+
+
+@micropython.viper
+def _detect_beats(read, ts_buf: ptr32, end_ticks: int, params: ptr16) -> int:
+    """
+    Sample `read()` until tick `end_ticks` and store the tick of every beat
+    in the ring `ts_buf` of `_WINDOW_SIZE` entries. `read` is expected to
+    block until the next sample (see `core.adc_sampler.read_sample`), so it
+    paces the loop.
+
+    `params` holds `thr_on, thr_off, eps` (viper functions take at most
+    four arguments). A beat starts when the signal rises above `thr_on`;
+    the next one can only start after it fell below `thr_off`. Like a
+    polygonal approximation sampler, a sample only reaches these tests once
+    it moved more than `eps` away from the last kept sample; on the flat
+    parts of the PPG wave most samples are dropped right after the read.
+
+    Returns the total number of beats seen; the most recent
+    `min(n, _WINDOW_SIZE)` timestamps end just before index
+    `n % _WINDOW_SIZE`.
+    """
+    thr_on = int(params[0])
+    thr_off = int(params[1])
+    eps = int(params[2])
+    ticks_ms = time.ticks_ms
+    ticks_diff = time.ticks_diff
+    head = 0
+    n = 0
+    last = 0
+    high = False
+    while int(ticks_diff(end_ticks, ticks_ms())) > 0:
+        v = int(read())
+        d = v - last
+        if d <= eps and d >= -eps:
+            continue
+        last = v
+        if high:
+            if v < thr_off:
+                high = False
+        elif v > thr_on:
+            high = True
+            ts_buf[head] = int(ticks_ms())
+            head += 1
+            if head >= _WINDOW_SIZE:
+                head = 0
+            n += 1
+    return n
+
+
+def _calibrate(calibration_time_ms):
+    """
+    Sample the sensor for `calibration_time_ms` ms and return `(min, max)`.
+    """
+    # Samples come from the PIO-paced ring, which only runs for the
+    # calibration window. The window is captured into `_CAL_BUF` first and
+    # reduced afterwards in one viper pass.
+    n = min(calibration_time_ms * SAMPLE_RATE_HZ // 1000, _CAL_SAMPLES)
+    buf = _CAL_BUF
+    read = read_sample
+    start_sampling()
+    try:
+        for i in range(n):
+            buf[i] = read()
+    finally:
+        stop_sampling()
+    packed = _minmax(buf, n)
+    return packed & 0xFFFF, packed >> 16
+
+
+def _thresholds(min_val, max_val):
+    # Hysteresis thresholds at 75% and 50% of the dynamic range above the
+    # minimum, in integer arithmetic.
+    span = max_val - min_val
+    return min_val + ((span * 3) >> 2), min_val + (span >> 1)
 
 
 def calibrate_threshold(calibration_time_ms=2000):
     """
     Sample the sensor for `calibration_time_ms` milliseconds and determine
-    a detection threshold based on observed min/max values.
+    the beat detection thresholds based on observed min/max values.
 
     The function records the minimum and maximum ADC values observed during
-    the calibration window and chooses a threshold value positioned at 70%
-    of the dynamic range above the minimum. This heuristic works well for
-    PPG signals where beats produce clear upward excursions above baseline.
+    the calibration window and places the upper threshold at 75% and the
+    lower one at 50% of the dynamic range above the minimum. This heuristic
+    works well for PPG signals where beats produce clear upward excursions
+    above baseline. It also re-arms the live beat detector.
 
     Args:
         calibration_time_ms: How long to sample for calibration (ms).
 
     Returns:
-        int: An integer threshold value suitable for use with `read_live_signal`
-             and beat detection.
+        tuple[int, int]: `(thr_on, thr_off)` suitable for use with
+                         `read_live_signal` and beat detection.
+    """
+
+    global _beat_state, _live_eps, _live_last
+    min_val, max_val = _calibrate(calibration_time_ms)
+    _beat_state = False
+    _live_eps = (max_val - min_val) >> 5
+    _live_last = 0
+    return _thresholds(min_val, max_val)
+
+
+# Thresholds of the last calibration, reused by `get_threshold`.
+_cached_threshold = None
+
+
+def get_threshold(force=False):
     """
+    Return the `(thr_on, thr_off)` thresholds, running `calibrate_threshold`
+    only on the first call, after `reset_threshold()` or when `force` is
+    set. A cached result still re-arms the live beat detector, so callers
+    see the same state as after a calibration.
+    """
+    global _cached_threshold, _beat_state, _live_last
+    if force or _cached_threshold is None:
+        _cached_threshold = calibrate_threshold()
+    else:
+        _beat_state = False
+        _live_last = 0
+    return _cached_threshold
 
-    min_val = 65535
-    max_val = 0
-    start = time.ticks_ms()
-    while time.ticks_diff(time.ticks_ms(), start) < calibration_time_ms:
-        value = pulse_sensor.read_u16()
-        min_val = min(min_val, value)
-        max_val = max(max_val, value)
-        # Small sleep to avoid hogging CPU and to allow ADC sampling cadence.
-        time.sleep_ms(2)
 
-    # Choose threshold at 70% of the dynamic range above the minimum.
-    threshold = min_val + (max_val - min_val) * 0.7
-    return int(threshold)
+def reset_threshold():
+    """
+    Forget the cached thresholds so the next `get_threshold` recalibrates.
+    The menu loop calls this whenever a menu action returns.
+    """
+    global _cached_threshold
+    _cached_threshold = None
 
 
 def measure_intervals(duration_sec=10):
@@ -76,9 +244,13 @@ def measure_intervals(duration_sec=10):
     Collect inter-beat timestamps for a blocking `duration_sec` period and
     return cleaned inter-beat intervals in milliseconds.
 
-    The function calibrates a threshold first, then timestamps rising-edge
-    events where the ADC reading crosses from below to above the threshold.
-    A sliding window of recent beat timestamps is kept to bound memory.
+    This is the standalone blocking API; the HR and HRV flows measure with
+    `app.hr_sampling.collect_intervals` and `read_live_signal` instead.
+
+    The function calibrates the thresholds first, then timestamps each beat
+    where the ADC reading rises above `thr_on` (see `_detect_beats`).
+    The most recent 20 beat timestamps are kept in the preallocated
+    `_WINDOW` ring to bound memory.
 
     Args:
         duration_sec: Measurement duration in seconds.
@@ -88,65 +260,129 @@ def measure_intervals(duration_sec=10):
                    physiologically plausible range.
     """
 
-    threshold = calibrate_threshold()
-    window = []
-    last_value = 0
-    start_time = time.ticks_ms()
-
-    # Sampling loop: read values until the requested measurement window ends.
-    while time.ticks_diff(time.ticks_ms(), start_time) < duration_sec * 1000:
-        value = pulse_sensor.read_u16()
-
-        # Detect rising-edge crossing: previous value below threshold and
-        # current value at/above threshold indicates a beat event.
-        if last_value < threshold and value >= threshold:
-            window.append(time.ticks_ms())
-            # Keep at most the last 20 timestamps to limit memory usage.
-            if len(window) > 20:
-                window.pop(0)
-
-        last_value = value
-        time.sleep_ms(2)
-
-    # If we observed at least two beats, compute inter-beat intervals and
-    # filter out implausible values (noise or missed detections).
-    if len(window) >= 2:
-        intervals = [time.ticks_diff(window[i], window[i - 1]) for i in range(1, len(window))]
-        # Accept intervals roughly between 250 ms (240 bpm) and 2000 ms (30 bpm).
-        return [d for d in intervals if 250 < d < 2000]
-    else:
+    global _WINDOW_HEAD, _WINDOW_COUNT
+
+    min_val, max_val = _calibrate(2000)
+    params = _DETECT_PARAMS
+    params[0], params[1] = _thresholds(min_val, max_val)
+    # Samples closer than 1/32 of the calibrated range to the last kept one
+    # are treated as flat baseline and skipped by the detector.
+    params[2] = (max_val - min_val) >> 5
+    end_time = time.ticks_add(time.ticks_ms(), duration_sec * 1000)
+
+    # Sampling loop: timestamps beats into the fixed `_WINDOW` ring, which
+    # therefore holds at most the last 20 beats.
+    start_sampling()
+    try:
+        n = _detect_beats(read_sample, _WINDOW, end_time, params)
+    finally:
+        stop_sampling()
+    _WINDOW_HEAD = n % _WINDOW_SIZE
+    _WINDOW_COUNT = min(n, _WINDOW_SIZE)
+
+    # If we observed at least two beats, compute inter-beat intervals from
+    # the oldest to the newest stored timestamp and filter out implausible
+    # values (noise or missed detections).
+    if _WINDOW_COUNT < 2:
         return []
+    start = _WINDOW_HEAD - _WINDOW_COUNT
+    window = _WINDOW
+    ticks_diff = time.ticks_diff
+    intervals = []
+    prev = window[start % _WINDOW_SIZE]
+    for i in range(1, _WINDOW_COUNT):
+        ts = window[(start + i) % _WINDOW_SIZE]
+        d = ticks_diff(ts, prev)
+        # Accept intervals roughly between 250 ms (240 bpm) and 2000 ms (30 bpm).
+        if _MIN_RR < d < _MAX_RR:
+            intervals.append(d)
+        prev = ts
+    return intervals
 
 
-def calculate_bpm(intervals):
+def calculate_bpm(intervals, count=None):
     """
-    Convert a list of inter-beat intervals (ms) to a BPM estimate.
+    Convert a sequence of inter-beat intervals (ms) to a BPM estimate.
+
+    Only the first `count` entries are used when `count` is given, so a
+    fixed-size window that is not yet full can be passed without slicing.
+    By default the whole sequence is used.
 
-    Returns 0 if no intervals are available. The BPM is computed from the
-    average interval and rounded to the nearest integer.
+    Returns 0 if no intervals are available. The BPM is 60000 divided by
+    the average interval, rounded to the nearest integer using integer
+    arithmetic only (no float objects are allocated).
     """
 
-    if not intervals:
+    if count is None:
+        count = len(intervals)
+    if not count:
         return 0
-    avg_interval = sum(intervals) / len(intervals)
-    return round(60000 / avg_interval)
+    total = 0
+    if count == len(intervals):
+        for x in intervals:
+            total += x
+    else:
+        for i in range(count):
+            total += intervals[i]
+    return (60000 * count + (total >> 1)) // total
 
 
-def read_live_signal(threshold):
+def read_live_signal(thr_on, thr_off):
     """
     Read one ADC sample and return the raw value plus a boolean indicating
-    whether a beat was detected at this sample (rising-edge detection).
+    whether a beat started at this sample.
+
+    The function keeps a module-level `_beat_state` to apply hysteresis: a
+    beat is reported once when the signal rises above `thr_on`, and the
+    detector re-arms only after the signal has fallen below `thr_off`.
+    This is useful for real-time UI updates where immediate beat events are
+    required.
 
-    The function uses a module-level `_last_value` to perform rising-edge
-    detection: a beat is reported when the signal crosses from below to
-    at-or-above the provided threshold. This is useful for real-time UI
-    updates where immediate beat events are required.
+    As in `_detect_beats`, a sample only reaches the threshold tests once it
+    moved more than 1/32 of the calibrated range away from the last tested
+    one; samples on the flat parts of the wave return right after the read.
+
+    The read blocks until the PIO sampler releases the next sample (see
+    `core.adc_sampler`), so loops calling this are paced by hardware and
+    need no sleep of their own.
     """ 
+    global _beat_state, _live_last
     value = read_sample()
-    if value is None:
-        return 0, False
+    d = value - _live_last
+    if -_live_eps <= d <= _live_eps:
+        return value, False
+    _live_last = value
+    if _beat_state:
+        if value < thr_off:
+            _beat_state = False
+        return value, False
+    if value > thr_on:
+        _beat_state = True
+        return value, True
+    return value, False
+
+
+@micropython.viper
+def push_sample(buf: ptr16, widx: int, value: int) -> int:
+    """
+    Store `value` at `widx` in a 128-sample ring buffer and return the next
+    write index.
 
-    beat = value > threshold
-    return value, beat
+    `buf` must be an `array.array('H')` of 128 entries. Compiled with the
+    viper emitter, so the store and index wrap run as machine instructions
+    instead of bytecode on every sample of the measurement loops.
+    """
+    buf[widx] = value
+    return (widx + 1) & _RING_MASK
 
 
+@micropython.native
+def beat_interval(now, last_beat):
+    """
+    Return the interval (ms) between beat timestamps `last_beat` and `now`,
+    or 0 if it falls outside the plausible 250–2000 ms range.
+    """
+    interval = time.ticks_diff(now, last_beat)
+    if _MIN_RR < interval < _MAX_RR:
+        return interval
+    return 0
@@ -21,17 +21,43 @@ Notes about statistics:
 - SDNN (standard deviation of NN intervals) is computed using the sample
     standard deviation formula (denominator N-1).
 
+All statistics are gathered in a single pass over `intervals` (Welford's
+running mean/variance for SDNN), compiled with the native emitter.
+
 The function is intentionally small and returns zeros when insufficient
 data is available (fewer than 2 intervals) so callers can handle that case
 explicitly (for example by showing an error or re-running the capture).
 """
 
+import micropython
+
+
+@micropython.native
 def calculate_hrv(intervals):
-    if len(intervals) < 2:
+    # One pass over the data: the running mean and M2 (sum of squared
+    # deviations) follow Welford's update for SDNN, while the squared
+    # successive differences for RMSSD are accumulated alongside.
+    n = len(intervals)
+    if n < 2:
         return 0, 0, 0, 0
-    mean_ppi = sum(intervals) / len(intervals)
+    # The first interval seeds the running values, so the loop body needs
+    # no "is there a previous interval" branch and no indexing.
+    it = iter(intervals)
+    prev = next(it)
+    mean = float(prev)
+    m2 = 0.0
+    ssd = 0
+    k = 1
+    for x in it:
+        k += 1
+        delta = x - mean
+        mean += delta / k
+        m2 += delta * (x - mean)
+        d = x - prev
+        ssd += d * d
+        prev = x
+    mean_ppi = mean
     mean_hr = 60000 / mean_ppi
-    rmssd = (sum((intervals[i] - intervals[i - 1]) ** 2 for i in range(1, len(intervals))) / (len(intervals) - 1)) ** 0.5
-    sdnn = (sum((x - mean_ppi) ** 2 for x in intervals) / (len(intervals) - 1)) ** 0.5
+    rmssd = (ssd / (n - 1)) ** 0.5
+    sdnn = (m2 / (n - 1)) ** 0.5
     return mean_hr, mean_ppi, rmssd, sdnn
-
@@ -0,0 +1,31 @@
+"""
+IRQ-driven input events shared by the menu loop and the handlers.
+
+The encoder button raises a hard IRQ on both edges (see `core.utils`). The
+handler only sets flags, so coroutines can `await` user input instead of
+polling the pin:
+
+- `wake_event` is set on every button edge (and by the `Encoder` IRQ on
+  every turn). The main menu loop sleeps on it between user actions.
+- `button_event` is set on each debounced press. Flows that wait for
+  "press to start" clear it and then await it.
+
+`uasyncio.ThreadSafeFlag` is the only uasyncio primitive that may be set
+from IRQ context, which is why it is used instead of `uasyncio.Event`.
+"""
+
+import uasyncio
+
+wake_event = uasyncio.ThreadSafeFlag()
+button_event = uasyncio.ThreadSafeFlag()
+
+
+async def wait_for_press():
+    """
+    Sleep until the next button press, without polling.
+
+    Any press latched before the call (e.g. the one that opened the current
+    screen) is discarded first.
+    """
+    button_event.clear()
+    await button_event.wait()
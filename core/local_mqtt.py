@@ -18,10 +18,17 @@ def connect_wifi(ssid=WIFI_SSID, password=WIFI_PASSWORD):
     wlan = network.WLAN(network.STA_IF)
     wlan.active(True)
     wlan.connect(ssid, password)
-    timeout = 10
-    while not wlan.isconnected() and timeout > 0:
-        time.sleep(1)
-        timeout -= 1
+    # Poll the link status every 100 ms for up to 10 s and stop as soon as
+    # an IP address is assigned or the connection has definitely failed.
+    for _ in range(100):
+        status = wlan.status()
+        if status == network.STAT_GOT_IP:
+            return True
+        if status in (network.STAT_WRONG_PASSWORD,
+                      network.STAT_NO_AP_FOUND,
+                      network.STAT_CONNECT_FAIL):
+            break
+        time.sleep_ms(100)
     return wlan.isconnected()
 
 def connect_mqtt():
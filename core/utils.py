@@ -1,6 +1,9 @@
-from machine import Pin
+from machine import Pin, idle
+from micropython import const
+import micropython
 import time
 from fifo import Fifo
+from core.input_events import wake_event, button_event
 
 """
 Encoder utility module for rotary input with button debounce.
@@ -10,7 +13,9 @@ detecting rotation direction, with optional encoder button debounce.
 
 Main features:
 1. A `Pin` is initialized for the encoder button with internal pull-up.
-2. A global debounce function `is_encoder_pressed()` filters button noise.
+2. A hard IRQ on the button latches debounced presses, which
+   `is_encoder_pressed()` tests and clears; `wait_for_click()` blocks
+   until a full press-release cycle.
 3. A `Encoder` class handles quadrature signal reading using GPIO interrupts.
    - Tracks signal on channel A and B.
    - Uses a FIFO to queue turn direction: -1 (left), +1 (right).
@@ -18,46 +23,169 @@ Main features:
 4. All IRQs use `hard=True` for low-latency response, suitable for MicroPython.
 
 Dependencies:
-- `machine.Pin` for GPIO input.
+- `machine.Pin` for GPIO input, `machine.idle` while waiting for a click.
 - `fifo.Fifo` custom FIFO class for tracking event queue.
 """
 
 def scale(value, v_min, v_max, y_min=0, y_max=63):
     """
     Scales a value from input range [v_min, v_max] to output range [y_min, y_max].
+
+    The mapping is inverted for screen coordinates (v_min -> y_max) and uses
+    integer arithmetic only.
     """
     if v_max == v_min:
         return (y_min + y_max) // 2  # prevent divide-by-zero
-    norm = (value - v_min) / (v_max - v_min)
-    return int(y_min + (1.0 - norm) * (y_max - y_min))
+    return y_max - (value - v_min) * (y_max - y_min) // (v_max - v_min)
+
+
+def set_scale(params, v_min, v_max, y_min=0, y_max=63):
+    """
+    Precompute the mapping used by `scale_fixed` into `params`.
+
+    `params` is an `array.array('i')` of 5 entries that receives
+    `v_min, v_span, mul, y_min, y_max`, where `mul` is the 16.16 fixed-point
+    ratio of the output span to the input span. It is filled once per frame
+    so the per-pixel call needs neither a division nor floats.
+    """
+    v_span = v_max - v_min
+    if v_span <= 0:
+        mid = (y_min + y_max) // 2
+        y_min = y_max = mid
+        v_span = 0
+        mul = 0
+    else:
+        mul = ((y_max - y_min) << 16) // v_span
+    params[0] = v_min
+    params[1] = v_span
+    params[2] = mul
+    params[3] = y_min
+    params[4] = y_max
+
+
+@micropython.viper
+def scale_fixed(value: int, params: ptr32) -> int:
+    """
+    Same mapping as `scale`, using the values prepared by `set_scale`.
 
+    The input is clamped to [v_min, v_max], so the result always lies in
+    [y_min, y_max].
+    """
+    d = value - params[0]
+    if d < 0:
+        d = 0
+    elif d > params[1]:
+        d = params[1]
+    return params[4] - ((d * params[2] + 0x8000) >> 16)
+
+
+ENCODER_BUTTON_PIN = const(12)
+
+# Minimum time (ms) between two accepted presses.
+_DEBOUNCE_MS = const(300)
 
-ENCODER_BUTTON_PIN = 12
 encoder_button = Pin(ENCODER_BUTTON_PIN, Pin.IN, Pin.PULL_UP)
 last_press_time = 0
 
+# Set by `_button_irq` on a debounced press, cleared by `is_encoder_pressed`.
+_pressed = False
+
+# Click tracking for `wait_for_click`, updated by `_button_irq`. Every
+# falling edge that starts a press bumps `_press_id` and stamps `_down_us`
+# (None while the button is up); a release after at least
+# CLICK_DEBOUNCE_US of LOW stores that press's id in `_clicked_id`.
+_press_id = 0
+_clicked_id = 0
+_down_us = None
+
+# Shortest LOW period (µs) accepted as a real click by `wait_for_click`.
+CLICK_DEBOUNCE_US = const(8000)
+
+def _button_irq(pin):
+    """
+    Hard IRQ handler for the encoder button (both edges).
+
+    Every edge wakes the main loop through `wake_event`. A falling edge that
+    leaves the pin LOW at least 300ms after the previous accepted press is
+    latched as a new press and also signals `button_event`. The edges are
+    also timestamped so `wait_for_click` can recognise complete clicks
+    without sampling the pin.
+    """
+
+    global last_press_time, _pressed, _press_id, _clicked_id, _down_us
+    wake_event.set()
+    if pin.value() == 0:
+        if _down_us is None:
+            _press_id += 1
+            _down_us = time.ticks_us()
+        now = time.ticks_ms()
+        if time.ticks_diff(now, last_press_time) > _DEBOUNCE_MS:
+            last_press_time = now
+            _pressed = True
+            button_event.set()
+    elif _down_us is not None:
+        if time.ticks_diff(time.ticks_us(), _down_us) >= CLICK_DEBOUNCE_US:
+            _clicked_id = _press_id
+        _down_us = None
+
+encoder_button.irq(
+    trigger=Pin.IRQ_FALLING | Pin.IRQ_RISING,
+    handler=_button_irq,
+    hard=True
+)
+
 def is_encoder_pressed():
     """
-    Check if the encoder button is pressed with debounce.
+    Check if the encoder button has been pressed, with debounce.
 
-    This function implements a simple software debounce using time ticks.
-    The encoder button is considered 'pressed' if:
-    - The pin reads LOW (`value() == 0`).
-    - At least 300ms have passed since the last registered press.
+    Presses are detected and debounced by `_button_irq`: a press counts if
+    the pin went LOW at least 300ms after the last registered press. This
+    function only tests and clears the latched flag, so polling it costs
+    no GPIO read or tick arithmetic.
 
     Returns:
-        bool: True if a valid (debounced) button press is detected,
-              False otherwise.
+        bool: True if a valid (debounced) button press happened since the
+              last call, False otherwise.
     """
 
-    global last_press_time
-    if encoder_button.value() == 0:
-        now = time.ticks_ms()
-        if time.ticks_diff(now, last_press_time) > 300:
-            last_press_time = now
-            return True
+    global _pressed
+    if _pressed:
+        _pressed = False
+        return True
     return False
 
+def clear_press():
+    """Discard a press latched by `_button_irq` but not yet consumed."""
+
+    global _pressed
+    _pressed = False
+
+def wait_for_click():
+    """
+    Block until the encoder button goes through a full press-release cycle.
+
+    The edges are timestamped by `_button_irq`; this function only sleeps
+    in `machine.idle()` until the IRQ reports a click, so the CPU is not
+    woken to sample the pin while a screen waits for the user. A LOW
+    period shorter than `CLICK_DEBOUNCE_US` is treated as contact bounce
+    and ignored.
+
+    The release time is recorded as the last press so `is_encoder_pressed()`
+    ignores any bounce that follows the release, and the press latched by
+    the IRQ for this click is discarded.
+
+    Only a press that starts after the call counts: if the button is still
+    held (e.g. the menu press that opened the current screen), its release
+    is not taken as the click.
+    """
+
+    global last_press_time, _pressed
+    start = _press_id
+    while _clicked_id - start <= 0:
+        idle()
+    last_press_time = time.ticks_ms()
+    _pressed = False
+
 class Encoder:
     """
     Rotary encoder handler with direction detection and FIFO queuing.
@@ -73,24 +201,28 @@ class Encoder:
         dir = enc.get_turn()  # Returns -1, 1, or 0
     """
 
-    def __init__(self, pin_a, pin_b):
+    def __init__(self, pin_a, pin_b, event=None):
         """
         Initialize encoder pins and attach interrupt.
 
         Args:
             pin_a (int): GPIO pin number connected to encoder channel A.
             pin_b (int): GPIO pin number connected to encoder channel B.
+            event (ThreadSafeFlag, optional): Flag set from the IRQ after
+                every queued turn so an event loop can sleep until input.
 
         Behaviour:
         - Configures both pins as input.
-        - Allocates a FIFO buffer (30 items, int type).
+        - Allocates a FIFO buffer (32 slots, int type); the power-of-two size
+          lets the FIFO wrap its indexes with a mask in IRQ context.
         - Attaches IRQ to pin A for rising edge events.
         - When triggered, `handler` is called to detect direction.
         """
 
         self.a = Pin(pin_a, Pin.IN)
         self.b = Pin(pin_b, Pin.IN)
-        self.fifo = Fifo(30, typecode='i')
+        self.fifo = Fifo(32, typecode='i')
+        self.event = event
         self.a.irq(trigger=Pin.IRQ_RISING, handler=self.handler, hard=True)
 
     def handler(self, pin):
@@ -101,6 +233,7 @@ class Encoder:
         - If pin B is HIGH when A rises, it’s counter-clockwise (-1).
         - If pin B is LOW when A rises, it’s clockwise (+1).
         - The direction value is pushed to the FIFO.
+        - If an `event` flag was given, it is set to wake the consumer.
 
         This method is intended to be used as a hardware IRQ callback.
         """
@@ -109,6 +242,8 @@ class Encoder:
             self.fifo.put(-1)
         else:
             self.fifo.put(1)
+        if self.event:
+            self.event.set()
 
     def get_turn(self):
         """
@@ -11,6 +11,8 @@ This module provides helper functions to:
 Global variables:
 - `client` holds the active MQTTClient instance after connection.
 - `kubios_result` stores parsed results from Kubios reply.
+- `_poller` is a `uselect.poll` object watching the client socket, so
+  waiting for a reply sleeps until data arrives.
 
 The module acts as a networking layer for HRV analysis publishing and
 result retrieval. Error handling is intentionally lightweight to avoid
@@ -21,6 +23,8 @@ device crash, printing status messages to console instead.
 import network
 import time
 import ujson
+import uselect
+import io
 from umqtt.simple import MQTTClient
 
 from core.config import (
@@ -40,20 +44,63 @@ from cloud.kubios_utils import handle_kubios_response, format_kubios_payload
 
 client = None
 kubios_result = None
+_poller = None
 
-def connect_wifi(ssid, password):
+
+class _BufferWriter(io.IOBase):
+    """
+    Write-only stream over a preallocated bytearray.
+
+    `ujson.dump` serializes straight into the buffer, so publishing does not
+    allocate a new payload string each time. `write` raises `ValueError`
+    when the payload does not fit; `pos` is the number of bytes written.
+    """
+
+    def __init__(self, size):
+        self.buf = bytearray(size)
+        self.view = memoryview(self.buf)
+        self.pos = 0
+
+    def write(self, data):
+        end = self.pos + len(data)
+        if end > len(self.buf):
+            raise ValueError("payload too large")
+        self.view[self.pos:end] = data
+        self.pos = end
+        return len(data)
+
+
+# Reused payload buffer for `publish_json`. 1 KiB fits a 30 s measurement
+# of RR intervals; larger payloads fall back to `ujson.dumps`.
+_PUB_WRITER = _BufferWriter(1024)
+
+# Wi-Fi association is checked every _WIFI_POLL_MS for up to
+# _WIFI_POLLS polls (10 s) per attempt.
+_WIFI_POLL_MS = 100
+_WIFI_POLLS = 100
+
+# Link states after which waiting longer cannot succeed.
+_WIFI_FAILED = (
+    network.STAT_WRONG_PASSWORD,
+    network.STAT_NO_AP_FOUND,
+    network.STAT_CONNECT_FAIL
+)
+
+def connect_wifi(ssid=WIFI_SSID, password=WIFI_PASSWORD):
     """
     Connect to a Wi-Fi access point with retry attempts.
 
     Behaviour:
     - Activates STA interface.
     - Attempts connection MAX_WIFI_RETRIES times.
-    - Each attempt waits up to 10 seconds for association.
-    - Prints diagnostic output to console during connection wait.
+    - Each attempt polls the link status every 100 ms for up to 10 seconds
+      and returns as soon as an IP address is assigned. An attempt ends
+      early when the status reports a definite failure (wrong password,
+      no AP found, connect failure).
 
     Args:
-        ssid (str): Wi-Fi SSID name.
-        password (str): Wi-Fi password.
+        ssid (str): Wi-Fi SSID name (defaults to `WIFI_SSID`).
+        password (str): Wi-Fi password (defaults to `WIFI_PASSWORD`).
 
     Returns:
         bool: True on successful connection,
@@ -64,17 +111,17 @@ def connect_wifi(ssid, password):
     wlan.active(True)
 
     for attempt in range(MAX_WIFI_RETRIES):
-        wlan.connect(WIFI_SSID, WIFI_PASSWORD)
+        wlan.connect(ssid, password)
 
-        timeout = 10
-        while not wlan.isconnected() and timeout > 0:
-            time.sleep(1)
-            timeout -= 1
-
-        if wlan.isconnected():
-            return True
+        for _ in range(_WIFI_POLLS):
+            status = wlan.status()
+            if status == network.STAT_GOT_IP:
+                return True
+            if status in _WIFI_FAILED:
+                break
+            time.sleep_ms(_WIFI_POLL_MS)
 
-    return False
+    return wlan.isconnected()
 
 def connect_mqtt():
     """
@@ -87,14 +134,16 @@ def connect_mqtt():
     - On success:
         - Prints confirmation.
         - Subscribes to `MQTT_TOPIC_SUB`.
+        - Registers the client socket with `_poller` for POLLIN.
 
     Returns:
         bool: True when connected and subscribed,
               False on persistent failure.
     """
 
-    global client
+    global client, _poller
 
+    _poller = None
     client = MQTTClient(
         client_id=MQTT_CLIENT_ID,
         server=MQTT_BROKER,
@@ -108,6 +157,11 @@ def connect_mqtt():
             client.connect(clean_session=True)
 
             client.subscribe(MQTT_TOPIC_SUB)
+
+            # Watch the broker socket so `wait_for_kubios_result` can block
+            # until data is readable instead of polling on a timer.
+            _poller = uselect.poll()
+            _poller.register(client.sock, uselect.POLLIN)
             return True
 
         except Exception as e:
@@ -122,7 +176,8 @@ def publish_json(topic, rr_intervals):
 
     Behaviour:
     - Builds payload using `format_kubios_payload(rr_intervals)`.
-    - Serializes to JSON string via `ujson.dumps`.
+    - Serializes it into the preallocated `_PUB_WRITER` buffer via
+      `ujson.dump`, falling back to `ujson.dumps` if it does not fit.
     - Publishes to `topic` via active MQTT client.
 
     Args:
@@ -137,7 +192,13 @@ def publish_json(topic, rr_intervals):
     global client
     if client:
         payload_dict = format_kubios_payload(rr_intervals)
-        payload = ujson.dumps(payload_dict)
+        writer = _PUB_WRITER
+        writer.pos = 0
+        try:
+            ujson.dump(payload_dict, writer)
+            payload = writer.view[:writer.pos]
+        except ValueError:
+            payload = ujson.dumps(payload_dict)
         client.publish(topic, payload)
     else:
         print("MQTT not connected!")
@@ -149,9 +210,13 @@ def wait_for_kubios_result(timeout=10):
     Wait asynchronously for Kubios analysis result to arrive via MQTT.
 
     Behaviour:
-    - Polls client.check_msg() in a loop.
+    - Blocks in `_poller.poll()` until the broker socket is readable or the
+      remaining time runs out, then lets `client.check_msg()` process the
+      message.
     - Returns global `kubios_result` when available.
     - Terminates after `timeout` seconds if no message arrived.
+    - Returns None at once when there is no poller: `_poller` is only
+      unset after a failed `connect_mqtt`, so no reply can arrive.
 
     Args:
         timeout (int): Seconds to wait before giving up.
@@ -163,24 +228,30 @@ def wait_for_kubios_result(timeout=10):
     """
 
     global kubios_result
-    start = time.time()
 
-    while time.time() - start < timeout:
-        client.check_msg()
+    if _poller is None:
+        return None
 
-        if kubios_result is not None:
-            return kubios_result
+    check_msg = client.check_msg
+    poll = _poller.poll
+    ticks_ms = time.ticks_ms
+    ticks_diff = time.ticks_diff
+    remaining = int(timeout * 1000)
 
-        time.sleep(0.1)
+    while remaining > 0 and kubios_result is None:
+        t0 = ticks_ms()
+        if poll(remaining):
+            check_msg()
+        remaining -= ticks_diff(ticks_ms(), t0)
 
-    return None
+    return kubios_result
 
 def on_message(topic, msg):
     """
     MQTT message callback handler for Kubios response parsing.
 
     Behaviour:
-    - Decodes inbound MQTT payload.
+    - Parses the inbound MQTT payload bytes directly.
     - Validates presence of 'data' field.
     - Extracts nested 'analysis' dictionary.
     - Normalizes HRV metrics into a flat result:
@@ -200,7 +271,9 @@ def on_message(topic, msg):
     global kubios_result
 
     try:
-        parsed = ujson.loads(msg.decode())
+        # `ujson.loads` accepts bytes, so the payload is not decoded to a
+        # str first.
+        parsed = ujson.loads(msg)
 
         if "data" not in parsed:
             return
@@ -210,14 +283,14 @@ def on_message(topic, msg):
         if not isinstance(raw_data, dict):
             return
 
-        analysis = raw_data.get("analysis", {})
+        get = raw_data.get("analysis", {}).get
         normalized = {
-            "mean_hr": analysis.get("mean_hr_bpm"),
-            "mean_ppi": analysis.get("mean_rr_ms"),
-            "rmssd": analysis.get("rmssd_ms"),
-            "sdnn": analysis.get("sdnn_ms"),
-            "sns": analysis.get("sns_index", 0),
-            "pns": analysis.get("pns_index", 0)
+            "mean_hr": get("mean_hr_bpm"),
+            "mean_ppi": get("mean_rr_ms"),
+            "rmssd": get("rmssd_ms"),
+            "sdnn": get("sdnn_ms"),
+            "sns": get("sns_index", 0),
+            "pns": get("pns_index", 0)
         }
 
         for key in ["mean_hr", "mean_ppi", "rmssd", "sdnn"]:
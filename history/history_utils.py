@@ -2,13 +2,20 @@
 Local HRV history storage and retrieval.
 
 This module provides lightweight persistent storage of HRV analysis
-results in a local JSON file, with a cap on maximum stored entries.
+results in local NDJSON files (one JSON object per line), with a cap on
+maximum stored entries.
 
 Features:
 1. Uses `/history/history.json` to store HRV records.
-2. Appends new entries with human-readable timestamps.
-3. Keeps only the latest 20 entries to avoid unbounded growth.
+2. Appends new entries with human-readable timestamps. A save only appends
+   one line; existing records are neither parsed nor rewritten.
+3. Keeps only the latest 20 entries to avoid unbounded growth. The line
+   count lives in a small `.idx` sidecar next to each file, and the file
+   is compacted back to 20 lines once it holds 40, so the rewrite cost is
+   paid once per 20 saves.
 4. Supports loading history as a list of records for display or sync.
+5. Files still in the old format (a single JSON array) are read as-is and
+   converted to NDJSON on the next save.
 
 Each entry contains:
 - `timestamp`: formatted as "dd.mm.yyyy hh:mm"
@@ -19,98 +26,213 @@ If the file does not exist or is corrupted, empty list is returned.
 
 import ujson
 import time
-import os
 
 BASE_DIR = "/history"  
 HISTORY_FILE = BASE_DIR + "/history.json"
 
 HISTORY_FILE_hrv = BASE_DIR + "/hrv_analysis.json"
 
+# Number of entries kept in HISTORY_FILE, and the line count at which the
+# file is compacted back down to MAX_ENTRIES.
+MAX_ENTRIES = 20
+_COMPACT_AT = 2 * MAX_ENTRIES
+
+
+def _idx_path(path):
+    return path.rsplit(".", 1)[0] + ".idx"
+
+
+def _read_records(path):
+    """
+    Read every record of `path`, oldest first.
+
+    NDJSON files are parsed line by line; a file written in the old format
+    (one JSON array) is parsed as a whole. Raises OSError if the file is
+    missing.
+    """
+    records = []
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line[0] == "[":
+                return ujson.loads(line + f.read())
+            records.append(ujson.loads(line))
+    return records
+
+
+def _write_records(path, records):
+    with open(path, "w") as f:
+        for record in records:
+            f.write(ujson.dumps(record))
+            f.write("\n")
+
+
+def _salvage_records(path):
+    """Read the lines of `path` that still parse, skipping broken ones."""
+    records = []
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                try:
+                    record = ujson.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict):
+                    records.append(record)
+    except OSError:
+        pass
+    return records
+
+
+def _is_ndjson(path):
+    """
+    Check that `path` is an empty file or NDJSON ending in a newline.
+
+    Only the first and last byte are read, so this is cheap enough to run
+    on every save.
+    """
+    try:
+        with open(path, "rb") as f:
+            first = f.read(1)
+            if not first:
+                return True
+            f.seek(-1, 2)
+            return first != b"[" and f.read(1) == b"\n"
+    except OSError:
+        return False
+
+
+def _read_count(path):
+    """
+    Return the line count of `path` from its `.idx` sidecar.
+
+    The sidecar is only trusted while the data file is still NDJSON ending
+    in a newline; a file replaced behind its back (e.g. re-copied in the
+    old array format by install.sh) yields None so the caller rewrites it.
+    """
+    try:
+        with open(_idx_path(path), "r") as f:
+            count = int(f.read())
+    except:
+        return None
+    return count if _is_ndjson(path) else None
+
+
+def _write_count(path, count):
+    with open(_idx_path(path), "w") as f:
+        f.write(str(count))
+
+
+def _append_record(path, data, max_entries=None):
+    """
+    Append `data` as one NDJSON line to `path` and update its line count.
+
+    Without a trusted sidecar count (first save, a file in the old array
+    format, or a sidecar left over from a replaced file) the file is
+    rewritten once as NDJSON to establish it; lines that no longer parse
+    are dropped. With
+    `max_entries`, the file is compacted to the newest `max_entries`
+    records whenever it reaches twice that many lines.
+    """
+    count = _read_count(path)
+    if count is None:
+        try:
+            records = _read_records(path)
+        except OSError:
+            records = []
+        except ValueError:
+            records = _salvage_records(path)
+        _write_records(path, records)
+        count = len(records)
+
+    with open(path, "a") as f:
+        f.write(ujson.dumps(data))
+        f.write("\n")
+    count += 1
+
+    if max_entries and count >= 2 * max_entries:
+        try:
+            records = _read_records(path)
+        except ValueError:
+            records = _salvage_records(path)
+        records = records[-max_entries:]
+        _write_records(path, records)
+        count = len(records)
+
+    _write_count(path, count)
+
+
+# Scratch buffer for `_format_timestamp`, laid out as "dd.mm.yyyy hh:mm".
+_TS_BUF = bytearray(b"00.00.0000 00:00")
+
+
+def _put2(buf, i, value):
+    buf[i] = 0x30 + value // 10
+    buf[i + 1] = 0x30 + value % 10
+
+
+def _format_timestamp():
+    # Fill the fixed "dd.mm.yyyy hh:mm" layout digit by digit instead of
+    # running the str.format parser on every save.
+    t = time.localtime()
+    buf = _TS_BUF
+    _put2(buf, 0, t[2])           # day
+    _put2(buf, 3, t[1])           # month
+    _put2(buf, 6, t[0] // 100)    # year
+    _put2(buf, 8, t[0] % 100)
+    _put2(buf, 11, t[3])          # hour
+    _put2(buf, 14, t[4])          # minute
+    return str(buf, "ascii")
+
+
 def save_to_history(data):
     """
     Save a new HRV data record to local history.
 
     Behaviour:
-    - Attempts to load existing history file.
-    - If file doesn't exist or is unreadable, starts with empty list.
     - Adds a human-readable timestamp to the record.
     - Rounds numerical HRV metrics to whole numbers for consistency.
-    - Appends the new entry to the history list.
-    - Retains only the most recent 20 entries (FIFO buffer).
-    - Overwrites the history file with the updated list.
+    - Appends the record as one line to the history file.
+    - Compacts the file to the most recent 20 entries once it has grown to
+      40 lines (FIFO buffer, see `_append_record`).
 
     Args:
         data (dict): HRV record containing keys like
             mean_hr, mean_ppi, rmssd, sdnn, sns, pns.
     """
 
-    try:
-        with open(HISTORY_FILE, "r") as f:
-            history = ujson.load(f)
-    except:
-        history = []
-        
-    timestamp = time.localtime()
-    data["timestamp"] = "{:02}.{:02}.{:04} {:02}:{:02}".format(
-        timestamp[2],  # day
-        timestamp[1],  # month
-        timestamp[0],  # year
-        timestamp[3],  # hour
-        timestamp[4]   # minute
-    )
+    data["timestamp"] = _format_timestamp()
 
     for key in ["mean_hr", "mean_ppi", "rmssd", "sdnn", "sns", "pns"]:
         if key in data:
             data[key] = round(data[key])
 
-    history.append(data)
-
-    if len(history) > 20:
-        history = history[-20:]
-
-    with open(HISTORY_FILE, "w") as f:
-        ujson.dump(history, f)
+    _append_record(HISTORY_FILE, data, MAX_ENTRIES)
 
 def load_history():
     """
-    Load saved HRV history records from JSON file.
+    Load saved HRV history records from the history file.
 
     Returns:
-        list: List of saved HRV records.
+        list: The most recent 20 saved HRV records, oldest first.
               Returns an empty list if the file is missing or unreadable.
     """
     
     try:
-        with open(HISTORY_FILE, "r") as f:
-            return ujson.load(f)
+        return _read_records(HISTORY_FILE)[-MAX_ENTRIES:]
     except:
         return []
 
 
 def append_to_hrv_history(data):
     try:
-        # Читаем историю из уже существующего (даже если он пустой)
-        with open(HISTORY_FILE_hrv, "r") as f:
-            content = f.read()
-            if not content.strip():
-                history = []
-            else:
-                history = ujson.loads(content)
-
         # Добавляем метку времени
-        timestamp = time.localtime()
-        data["timestamp"] = "{:02}.{:02}.{:04} {:02}:{:02}".format(
-            timestamp[2], timestamp[1], timestamp[0], timestamp[3], timestamp[4]
-        )
-
-        # Добавляем новую запись
-        history.append(data)
+        data["timestamp"] = _format_timestamp()
 
-        # Записываем обратно
-        with open(HISTORY_FILE_hrv, "w") as f:
-            ujson.dump(history, f)
-            f.flush()
-            time.sleep(0.1)
+        # Дописываем новую запись одной строкой в конец файла
+        _append_record(HISTORY_FILE_hrv, data)
 
     except Exception as e:
-        print("[HRV] ❌ Ошибка при сохранении:", e)
\ No newline at end of file
+        print("[HRV] ❌ Ошибка при сохранении:", e)
@@ -13,7 +13,8 @@ class Fifo:
     def __init__(self, size, typecode = 'H'):
         """Parameters
 
-        size (int): Fifo size. The maximum number of items stored is one less than the given size
+        size (int): Fifo size. The maximum number of items stored is one less than the given size.
+                    A power of two lets the indexes wrap with a bit mask instead of a modulo.
         typecode (char): Type of data stored in fifo. (Default is 'H' - unsigned short)
         """        
         self.data = array.array(typecode)
@@ -22,11 +23,16 @@ class Fifo:
         self.head = 0
         self.tail = 0
         self.size = size
+        # Index mask when size is a power of two, otherwise 0 (use modulo)
+        self.mask = size - 1 if size & (size - 1) == 0 else 0
         self.dc = 0
         
     def put(self, value):
         """Put one item into the fifo. Raises an exception if the fifo is full."""
-        nh = (self.head + 1) % self.size
+        if self.mask:
+            nh = (self.head + 1) & self.mask
+        else:
+            nh = (self.head + 1) % self.size
         if nh != self.tail:
             self.data[self.head] = value
             self.head = nh
@@ -39,6 +45,8 @@ class Fifo:
         val = self.data[self.tail]
         if self.empty():
             raise RuntimeError("Fifo is empty")
+        elif self.mask:
+            self.tail = (self.tail + 1) & self.mask
         else:
             self.tail = (self.tail + 1) % self.size
         return val
@@ -9,7 +9,7 @@ Includes:
 - Menu UI (main navigation)
 - HR/HRV measurement and results screens
 - History views (list, details, back navigation)
-- Countdown animations and ECG visualization
+- ECG visualization
 - Common display helpers (errors, placeholders, sending)
 - OLED control object
 
@@ -21,6 +21,6 @@ from .layout_menu import show_menu
 from .layout_hr import show_start_instruction, show_hr_screen
 from .layout_hrv import show_hrv_screen, show_kubios_results
 from .layout_history import show_history_list, show_measurement_detail, show_back_menu
-from .layout_animations import show_countdown_animation, draw_ecg_frame
+from .layout_animations import draw_ecg_frame
 from .layout_common import show_placeholder, show_error_screen, show_sending_screen
 from .oled import oled
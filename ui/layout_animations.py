@@ -1,112 +1,166 @@
-from ui.oled import oled, WIDTH, GRAPH_TOP, GRAPH_HEIGHT, GRAPH_BOTTOM, SIGNAL_MIN, SIGNAL_MAX, GAIN
+from ui.oled import oled, WIDTH, HEIGHT, PAGE_HEIGHT, GRAPH_TOP, GRAPH_HEIGHT, GRAPH_BOTTOM, SIGNAL_MIN, SIGNAL_MAX, GAIN
 import time
-from core.hrm import calibrate_threshold, pulse_sensor
+import array
+import micropython
+from core.hrm import get_threshold, pulse_sensor, push_sample, RING_MASK
+from core.utils import set_scale
 
 
-def process_sample(raw, smoothed, threshold, last_value, beat_times):
-    smoothed = int(0.2 * raw + 0.8 * smoothed)
-    beat = False
-    interval = None
+# Vertical scaling parameters (see `core.utils.set_scale`), refilled every
+# frame.
+_SCALE = array.array('i', [0] * 5)
 
-    if last_value < threshold and smoothed >= threshold:
-        beat = True
-        now = time.ticks_ms()
-        beat_times.append(now)
-        if len(beat_times) > 1:
-            interval = time.ticks_diff(beat_times[-1], beat_times[-2])
-            if not (250 < interval < 2000):
-                interval = None
+# Screen row of every column of the ECG graph, refilled every frame.
+_ROWS = bytearray(WIDTH)
 
-    return smoothed, beat, interval
+# Smoothed samples of the Kubios ECG view, refilled every frame.
+_SMOOTH = array.array('H', [0] * WIDTH)
 
 
-def draw_ecg_frame(raw_data, time_left, bpm=None, beat=False, v_min=None, v_max=None):
+@micropython.viper
+def scale_buf(src: ptr16, head: int, dst: ptr8, params: ptr32):
     """
-    Draw ECG graph using either adaptive or fixed scaling.
+    Write the screen row of every sample of the WIDTH-entry ring `src`
+    (oldest first, starting at `head`) into `dst`.
+
+    Uses the mapping prepared by `core.utils.set_scale`, inlined so the
+    whole pass runs as native code without a call per column. The width
+    and ring mask are read once per call from `ui.oled` and `core.hrm`.
+    """
+    width = int(WIDTH)
+    mask = int(RING_MASK)
+    v_min = params[0]
+    v_span = params[1]
+    mul = params[2]
+    y_max = params[4]
+    for x in range(width):
+        d = int(src[(head + x) & mask]) - v_min
+        if d < 0:
+            d = 0
+        elif d > v_span:
+            d = v_span
+        dst[x] = y_max - ((d * mul + 0x8000) >> 16)
+
+
+@micropython.viper
+def plot_wave(fb: ptr8, ys: ptr8, n: int):
     """
-    oled.fill(0)
-    display_data = raw_data[-WIDTH:]
+    Draw the polyline through (x, ys[x]) for x < n straight into the
+    SSD1306 framebuffer `fb` (MONO_VLSB: pixel (x, y) is bit y & 7 of byte
+    (y >> 3) * WIDTH + x).
 
-    # Adaptive or fixed vertical scaling
-    local_min = min(display_data) if v_min is None else v_min
-    local_max = max(display_data) if v_max is None else v_max
+    Consecutive columns are joined like a steep Bresenham line: the first
+    column covers the half of the rise nearest its point, and the second
+    column covers the other half. Rows must already lie on the screen.
+    """
+    width = int(WIDTH)
+    prev = ys[0]
+    for x in range(1, n):
+        y = ys[x]
+        mid = (prev + y) >> 1
+        col = x - 1
+        # Column x - 1 from prev to mid
+        if prev <= mid:
+            a = prev
+            b = mid
+        else:
+            a = mid
+            b = prev
+        while a <= b:
+            i = (a >> 3) * width + col
+            fb[i] = fb[i] | (1 << (a & 7))
+            a += 1
+        # Column x from mid to y
+        if mid <= y:
+            a = mid
+            b = y
+        else:
+            a = y
+            b = mid
+        while a <= b:
+            i = (a >> 3) * width + x
+            fb[i] = fb[i] | (1 << (a & 7))
+            a += 1
+        prev = y
 
-    def scale(val):
-        if local_max == local_min:
-            return GRAPH_TOP + GRAPH_HEIGHT // 2
-        norm = (val - local_min) / (local_max - local_min)
-        return int(GRAPH_TOP + (1.0 - norm) * (GRAPH_HEIGHT - 1))
 
-    scaled = [scale(val) for val in display_data]
+# Header values currently on screen (see `draw_ecg_frame`). `_hdr_time`
+# is None when the header must be redrawn regardless.
+_hdr_time = None
+_hdr_bpm = None
+_hdr_beat = False
 
-    for x in range(1, len(scaled)):
-        oled.line(x - 1, scaled[x - 1], x, scaled[x], 1)
 
-    oled.text(f"{time_left}s", 0, 0)
-    if bpm is not None:
-        oled.text(f"{bpm} BPM", 60, 0)
-    if beat:
-        oled.text("♥", 110, 0)
-
-    oled.show()
+def reset_ecg_header():
+    """Force the next `draw_ecg_frame` to redraw and send the whole screen."""
+    global _hdr_time
+    _hdr_time = None
 
 
-def show_countdown_animation(duration=30):
+def draw_ecg_frame(buf, head, time_left, bpm=None, beat=False, v_min=None, v_max=None):
     """
-    Show ECG animation with hybrid scaling:
-    - First 2 seconds use adaptive auto-scaling
-    - Then switch to fixed min/max based on early data
+    Draw ECG graph using either adaptive or fixed scaling.
+
+    `buf` is a ring buffer holding WIDTH samples and `head` is the index of
+    the oldest one (the next slot to be overwritten). Samples are read in
+    place as `buf[(head + x) & RING_MASK]`, so no slice is copied per frame.
+
+    The header line (time left, BPM, beat mark) only changes about once per
+    second, so it is redrawn only when one of its values changed. Other
+    frames clear and send just the graph pages (1..7).
+
+    Frames go out with `oled.show_async`, so sampling continues during the
+    I2C transfer. While the previous frame is still being sent this one is
+    skipped. Call `reset_ecg_header()` before the first frame of a new
+    screen.
+
+    Returns:
+        bool: True if the frame was sent, False if it was skipped.
     """
-    
-    start = time.ticks_ms()
-    intervals = []
-    beat_times = []
-    last_value = 0
-    smoothed = 0
+    global _hdr_time, _hdr_bpm, _hdr_beat
 
-    threshold = calibrate_threshold()
-    buffer = [SIGNAL_MIN] * WIDTH
+    if oled.busy:
+        return False
 
-    scaling_samples = []  # For collecting initial signal range
-    fixed_scaling_ready = False
-    v_min_fixed = None
-    v_max_fixed = None
+    header = time_left != _hdr_time or bpm != _hdr_bpm or beat != _hdr_beat
+    if header:
+        oled.fill(0)
+    else:
+        oled.fill_rect(0, PAGE_HEIGHT, WIDTH, HEIGHT - PAGE_HEIGHT, 0)
 
-    while time.ticks_diff(time.ticks_ms(), start) < duration * 1000:
-        now = time.ticks_ms()
-        elapsed = (now - start) // 1000
-        remaining = duration - elapsed
+    # Adaptive or fixed vertical scaling
+    local_min = min(buf) if v_min is None else v_min
+    local_max = max(buf) if v_max is None else v_max
 
-        raw = pulse_sensor.read_u16()
-        smoothed, beat, interval = process_sample(
-            raw, smoothed, threshold, last_value, beat_times)
-        last_value = smoothed
-
-        if interval:
-            intervals.append(interval)
-
-        buffer.append(smoothed)
-        if len(buffer) > WIDTH:
-            buffer.pop(0)
-
-        # Collect samples for scaling during first 2 seconds
-        if not fixed_scaling_ready:
-            scaling_samples.append(smoothed)
-            if elapsed >= 2:
-                v_min_fixed = min(scaling_samples)
-                v_max_fixed = max(scaling_samples)
-                fixed_scaling_ready = True
-
-        # Draw frame with fixed or adaptive scaling
-        if fixed_scaling_ready:
-            draw_ecg_frame(buffer, time_left=remaining, bpm=intervals and 60000 // intervals[-1], beat=beat,
-                           v_min=v_min_fixed, v_max=v_max_fixed)
-        else:
-            draw_ecg_frame(buffer, time_left=remaining, bpm=intervals and 60000 // intervals[-1], beat=beat)
+    # Integer mapping of [local_min, local_max] onto the graph rows, with
+    # the highest value at the top.
+    params = _SCALE
+    set_scale(params, local_min, local_max, GRAPH_TOP, GRAPH_TOP + GRAPH_HEIGHT - 1)
 
-        time.sleep_ms(20)
+    rows = _ROWS
+    scale_buf(buf, head, rows, params)
+    plot_wave(oled.buffer, rows, WIDTH)
+
+    if not header:
+        oled.show_async(1, HEIGHT // PAGE_HEIGHT - 1)
+        return True
+
+    oled.text(f"{time_left}s", 0, 0)
+    if bpm is not None:
+        oled.text(f"{bpm} BPM", 60, 0)
+    if beat:
+        oled.text("♥", 110, 0)
+    _hdr_time = time_left
+    _hdr_bpm = bpm
+    _hdr_beat = beat
+
+    oled.show_async()
+    return True
+
+# Minimum time between Kubios ECG frames (about 30 fps); a full frame takes
+# ~20 ms on the I2C bus, so drawing more often only repeats work.
+KUBIOS_FRAME_MS = 33
 
-    return intervals
 
 def show_countdown_animation_kubios(duration=30):
     start = time.ticks_ms()
@@ -114,88 +168,143 @@ def show_countdown_animation_kubios(duration=30):
 
     intervals = []
     beat_times = []
-    threshold = calibrate_threshold()
+    # Only the upper (beat) threshold is used by this rising-edge detector.
+    threshold, _ = get_threshold()
     last_value = 0
-
-    ecg_buffer = []         # small rolling window of recent sensor values
-    max_ecg_length = 128    # width of the OLED
-
-    while time.ticks_diff(time.ticks_ms(), start) < duration * 1000:
-        elapsed = time.ticks_diff(time.ticks_ms(), start) // 1000
+    bpm = None  # BPM of the latest interval, updated once per beat
+
+    # Ring buffer of the most recent sensor values (one per OLED column).
+    # `head` is the next slot to write and `count` how many are valid, so
+    # the oldest sample sits at `head - count`.
+    ecg_buffer = array.array('H', [0] * WIDTH)
+    head = 0
+    count = 0
+
+    # Bind the per-sample callables to locals once.
+    ticks_ms = time.ticks_ms
+    ticks_diff = time.ticks_diff
+    sleep_ms = time.sleep_ms
+    read = pulse_sensor.read_u16
+    push = push_sample
+    draw = draw_ecg_frame_kubios
+    duration_ms = duration * 1000
+    last_draw = time.ticks_add(start, -KUBIOS_FRAME_MS)  # draw at once
+
+    while True:
+        now = ticks_ms()
+        since = ticks_diff(now, start)
+        if since >= duration_ms:
+            break
+        elapsed = since // 1000
         remaining = duration - elapsed
 
         # --- Read pulse sensor ---
-        value = pulse_sensor.read_u16()
+        value = read()
 
         # Update ECG buffer
-        ecg_buffer.append(value)
-        if len(ecg_buffer) > max_ecg_length:
-            ecg_buffer.pop(0)
+        head = push(ecg_buffer, head, value)
+        if count < WIDTH:
+            count += 1
 
         # --- Detect beats (same logic as before) ---
         if last_value < threshold and value >= threshold:
-            now = time.ticks_ms()
             beat_times.append(now)
             if len(beat_times) > 1:
-                interval = time.ticks_diff(beat_times[-1], beat_times[-2])
+                interval = ticks_diff(beat_times[-1], beat_times[-2])
                 if 250 < interval < 2000:
                     intervals.append(interval)
+                    bpm = 60000 // interval
         last_value = value
 
         # --- Only update text header once per second ---
         if remaining != last_second:
             last_second = remaining
 
-        # --- Draw ECG graph (FULL SCREEN UPDATE) ---
-        draw_ecg_frame_kubios(
-            data=ecg_buffer,
-            time_left=remaining,
-            bpm=None  # optional: compute live BPM if wanted
-        )
+        # --- Draw ECG graph at most every KUBIOS_FRAME_MS ---
+        # Sampling and beat detection above still run every iteration.
+        # A frame skipped on a busy bus is retried on the next sample.
+        if ticks_diff(now, last_draw) >= KUBIOS_FRAME_MS:
+            if draw(
+                ecg_buffer, head, count,
+                time_left=remaining,
+                bpm=bpm
+            ):
+                last_draw = now
 
-        time.sleep_ms(5)
+        sleep_ms(5)
 
     return intervals
 
 
 
-def draw_ecg_frame_kubios(data, time_left, bpm=None):
+def draw_ecg_frame_kubios(buf, head, count, time_left, bpm=None):
+    """
+    Draw the Kubios ECG view from the newest `count` samples of the ring
+    buffer `buf`, whose next write index is `head` (see
+    `show_countdown_animation_kubios`). Like `draw_ecg_frame`, the frame
+    is sent with `oled.show_async` and skipped while a transfer is running;
+    returns True if the frame was sent.
+    """
+    if oled.busy:
+        return False
     oled.fill_rect(0, 14, 128, 50, 0)
-    if not data:
-        oled.show()
-        return
+    if not count:
+        oled.show_async()
+        return True
 
     # -------- OPTIONAL SMOOTHING (makes graph less noisy) ----------
-    def smooth(arr, window=3):
-        if len(arr) < window:
-            return arr
-        sm = []
-        for i in range(len(arr)):
-            s = max(0, i - window)
-            e = min(len(arr), i + window)
-            sm.append(sum(arr[s:e]) // (e - s))
-        return sm
-
-    data = smooth(data, window=3)
+    # Average of the samples in [i - 3, i + 3) for every i, read from the
+    # ring oldest first. A running sum slides the window, adding the sample
+    # that enters and subtracting the one that leaves, so each frame is one
+    # linear pass into the preallocated `_SMOOTH` without any slicing.
+    window = 3
+    start = head - count
+    data = _SMOOTH
+    mask = RING_MASK
+    if count < window:
+        for i in range(count):
+            data[i] = buf[(start + i) & mask]
+    else:
+        total = 0
+        for i in range(window):
+            total += buf[(start + i) & mask]
+        for i in range(count):
+            lo = i - window if i > window else 0
+            hi = i + window if i + window < count else count
+            data[i] = total // (hi - lo)
+            if i + window < count:
+                total += buf[(start + i + window) & mask]
+            if i >= window:
+                total -= buf[(start + i - window) & mask]
 
     # -------- SCALING & CENTERING IMPROVEMENTS ----------
-    max_val = max(data)
-    min_val = min(data)
+    # The builtin min/max scan in C; a memoryview limits them to the valid
+    # samples without copying while the ring is still filling.
+    valid = data if count == WIDTH else memoryview(data)[:count]
+    max_val = max(valid)
+    min_val = min(valid)
 
     graph_height = 48
     top_margin = 14
 
     # Use 80% of area for the waveform → padding on top/bottom
-    usable_height = int(graph_height * 0.8)
-    vertical_offset = int(graph_height * 0.1)
-
-    scale = usable_height / (max_val - min_val) if max_val != min_val else 1
-
-    # Draw waveform line-by-line
-    for x in range(len(data) - 1):
-        y1 = top_margin + vertical_offset + usable_height - int((data[x] - min_val) * scale)
-        y2 = top_margin + vertical_offset + usable_height - int((data[x + 1] - min_val) * scale)
-        oled.line(x, y1, x + 1, y2, 1)
+    usable_height = graph_height * 4 // 5
+    vertical_offset = graph_height // 10
+
+    # Integer mapping y = base - (v - min_val) * num // den, set up once per
+    # frame. A flat signal keeps a scale of 1 as before.
+    base = top_margin + vertical_offset + usable_height
+    if max_val != min_val:
+        num = usable_height
+        den = max_val - min_val
+    else:
+        num = den = 1
+
+    # Map every sample to its row, then draw the waveform in one pass.
+    rows = _ROWS
+    for x in range(count):
+        rows[x] = base - (data[x] - min_val) * num // den
+    plot_wave(oled.buffer, rows, count)
 
     # Header bar
     oled.fill_rect(0, 0, 128, 13, 0)
@@ -203,4 +312,5 @@ def draw_ecg_frame_kubios(data, time_left, bpm=None):
     if bpm is not None:
         oled.text(f"{bpm} BPM", 64, 0)
 
-    oled.show()
+    oled.show_async()
+    return True
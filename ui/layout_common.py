@@ -12,12 +12,53 @@ Screens included:
 User interactions:
 - Error screen supports encoder button press to retry early.
 - All screens are rendered on OLED and block the current flow.
+
+Static labels are rendered once at import with `label_tile` and drawn with
+`blit_label`, which the other layout modules use as well.
 """
 
 
 from ui.oled import oled
+import framebuf
 import time
-from core.utils import is_encoder_pressed
+from core.utils import is_encoder_pressed, clear_press
+
+
+def label_tile(text):
+    """
+    Render a fixed label once into its own 8 px high framebuffer.
+
+    Args:
+        text (str): Label text (8x8 font, 8 px per character).
+
+    Returns:
+        tuple: (FrameBuffer, width in pixels), to be drawn with `blit_label`.
+    """
+    width = len(text) * 8
+    tile = framebuf.FrameBuffer(bytearray(width), width, 8, framebuf.MONO_VLSB)
+    tile.text(text, 0, 0, 1)
+    return tile, width
+
+
+def blit_label(label, x, y):
+    """
+    Copy a `label_tile` onto the OLED at (x, y).
+
+    Returns:
+        int: X coordinate just right of the label, where a value can follow.
+    """
+    tile, width = label
+    oled.blit(tile, x, y)
+    return x + width
+
+
+_COMING_SOON = label_tile("COMING SOON")
+PRESS_TO_RETURN = label_tile("PRESS TO RETURN")
+_SENDING_DATA = label_tile("SENDING DATA...")
+_ERROR_SENDING = label_tile("ERROR SENDING DATA")
+_PRESS_TO_RETRY = label_tile("PRESS TO RETRY")
+_OR_WAIT = label_tile("OR WAIT")
+
 
 def show_placeholder(title):
     """
@@ -34,8 +75,8 @@ def show_placeholder(title):
 
     oled.fill(0)
     oled.text(title, 0, 10)
-    oled.text("COMING SOON", 0, 30)
-    oled.text("PRESS TO RETURN", 0, 50)
+    blit_label(_COMING_SOON, 0, 30)
+    blit_label(PRESS_TO_RETURN, 0, 50)
     oled.show()
 
 def show_sending_screen():
@@ -49,7 +90,7 @@ def show_sending_screen():
     """
      
     oled.fill(0)
-    oled.text("SENDING DATA...", 0, 20)
+    blit_label(_SENDING_DATA, 0, 20)
     oled.show()
 
 def show_error_screen():
@@ -66,11 +107,13 @@ def show_error_screen():
         str: "retry" if user presses encoder, otherwise "exit"
     """
 
+    # Ignore a press latched before the screen was shown.
+    clear_press()
     for seconds in range(3, -1, -1):
         oled.fill(0)
-        oled.text("ERROR SENDING DATA", 0, 0)
-        oled.text("PRESS TO RETRY", 0, 20)
-        oled.text("OR WAIT", 0, 35)
+        blit_label(_ERROR_SENDING, 0, 0)
+        blit_label(_PRESS_TO_RETRY, 0, 20)
+        blit_label(_OR_WAIT, 0, 35)
         oled.text(f"{seconds} sec", 0, 45)
         oled.show()
 
@@ -15,10 +15,22 @@ Data fields displayed:
 - Timestamp, HR, PPI, RMSSD, SDNN, SNS, PNS
 """
 
-from .oled import oled
+from .oled import oled, render_lines
 import time
 from core.utils import is_encoder_pressed, encoder_button
 
+# Rows shown by `show_history_list` and the Y coordinate of each.
+_LIST_ROWS = 5
+_YS = (0, 10, 20, 30, 40)
+
+# Row texts with and without the selection marker, built once.
+_MEAS_LABELS_SEL = tuple(f"> MEASUREMENT {i+1}" for i in range(_LIST_ROWS))
+_MEAS_LABELS_UN = tuple(f"  MEASUREMENT {i+1}" for i in range(_LIST_ROWS))
+
+_BACK_OPTIONS = ("BACK TO HISTORY", "BACK TO MAIN")
+_BACK_LABELS_SEL = tuple("> " + option for option in _BACK_OPTIONS)
+_BACK_LABELS_UN = tuple("  " + option for option in _BACK_OPTIONS)
+
 def show_history_list(history, selected_index):
     """
     Display a vertical list of the 5 most recent measurements.
@@ -34,9 +46,12 @@ def show_history_list(history, selected_index):
     """
 
     oled.fill(0)
-    for i, _ in enumerate(history[-5:]):
-        prefix = "> " if i == selected_index else "  "
-        oled.text(prefix + f"MEASUREMENT {i+1}", 0, i * 10)
+    count = len(history)
+    if count > _LIST_ROWS:
+        count = _LIST_ROWS
+    for i in range(count):
+        labels = _MEAS_LABELS_SEL if i == selected_index else _MEAS_LABELS_UN
+        oled.text(labels[i], 0, _YS[i])
     oled.show()
 
 def show_measurement_detail(data, encoder):
@@ -60,13 +75,15 @@ def show_measurement_detail(data, encoder):
     """
 
     oled.fill(0)
-    oled.text(f"{data['timestamp']}", 0, 0)
-    oled.text(f"HR: {int(data['mean_hr'])}", 0, 10)
-    oled.text(f"PPI: {int(data['mean_ppi'])}", 0, 20)
-    oled.text(f"RMSSD: {int(data['rmssd'])}", 0, 30)
-    oled.text(f"SDNN: {int(data['sdnn'])}", 0, 40)
-    oled.text(f"SNS: {round(data['sns'], 2)}", 0, 50)
-    oled.text(f"PNS: {round(data['pns'], 2)}", 0, 60)
+    render_lines((
+        f"{data['timestamp']}",
+        f"HR: {int(data['mean_hr'])}",
+        f"PPI: {int(data['mean_ppi'])}",
+        f"RMSSD: {int(data['rmssd'])}",
+        f"SDNN: {int(data['sdnn'])}",
+        f"SNS: {round(data['sns'], 2)}",
+        f"PNS: {round(data['pns'], 2)}",
+    ), 0, 0, 10)
     oled.show()
 
     while not is_encoder_pressed():
@@ -93,14 +110,14 @@ def show_back_menu(encoder):
         str: Selected option text.
     """
     
-    options = ["BACK TO HISTORY", "BACK TO MAIN"]
+    options = _BACK_OPTIONS
     selected = 0
 
     while True:
         oled.fill(0)
-        for i, option in enumerate(options):
-            prefix = "> " if i == selected else "  "
-            oled.text(prefix + option, 0, i * 10 + 10)
+        for i in range(len(options)):
+            labels = _BACK_LABELS_SEL if i == selected else _BACK_LABELS_UN
+            oled.text(labels[i], 0, i * 10 + 10)
         oled.show()
 
         turn = encoder.get_turn()
@@ -13,6 +13,16 @@ User interaction:
 """
 
 from .oled import oled
+from .layout_common import label_tile, blit_label
+
+_START_LINES = (
+    (label_tile("START MEASUREMENT"), 20),
+    (label_tile("BY PRESSING"), 30),
+    (label_tile("THE BUTTON"), 40),
+)
+_PRESS_ENCODER = label_tile("PRESS ENCODER")
+_TO_RETURN = label_tile("TO RETURN")
+_BPM = label_tile(" BPM")
 
 def show_start_instruction():
     """
@@ -25,9 +35,8 @@ def show_start_instruction():
     """
 
     oled.fill(0)
-    oled.text("START MEASUREMENT", 0, 20)
-    oled.text("BY PRESSING", 0, 30)
-    oled.text("THE BUTTON", 0, 40)
+    for label, y in _START_LINES:
+        blit_label(label, 0, y)
     oled.show()
 
 def show_hr_screen(bpm):
@@ -44,9 +53,11 @@ def show_hr_screen(bpm):
     """
     
     oled.fill(0)
-    oled.text(f"{bpm} BPM", 0, 10)
-    oled.text("PRESS ENCODER", 0, 30)
-    oled.text("TO RETURN", 0, 40)
+    value = str(bpm)
+    oled.text(value, 0, 10)
+    blit_label(_BPM, len(value) * 8, 10)
+    blit_label(_PRESS_ENCODER, 0, 30)
+    blit_label(_TO_RETURN, 0, 40)
     oled.show()
     
    
\ No newline at end of file
@@ -14,6 +14,21 @@ User is prompted to press the encoder to return after viewing.
 """
 
 from .oled import oled
+from .layout_common import label_tile, blit_label, PRESS_TO_RETURN
+
+_START_LINES = (
+    (label_tile("START MEASUREMENT"), 0),
+    (label_tile("BY PLACING FINGER"), 10),
+    (label_tile("ON THE SENSOR AND"), 20),
+    (label_tile("PRESS THE BUTTON TO"), 30),
+    (label_tile("START"), 40),
+)
+_HR = label_tile("HR: ")
+_PPI = label_tile("PPI: ")
+_RMSSD = label_tile("RMSSD: ")
+_SDNN = label_tile("SDNN: ")
+_SNS = label_tile("SNS: ")
+_PNS = label_tile("PNS: ")
 
 def show_start_instruction_hrv():
     """
@@ -25,11 +40,8 @@ def show_start_instruction_hrv():
     - Typically shown before countdown or HRV capture begins.
     """
     oled.fill(0)
-    oled.text("START MEASUREMENT", 0, 0)
-    oled.text("BY PLACING FINGER", 0, 10)
-    oled.text("ON THE SENSOR AND", 0, 20)
-    oled.text("PRESS THE BUTTON TO", 0, 30)
-    oled.text("START", 0, 40)
+    for label, y in _START_LINES:
+        blit_label(label, 0, y)
     oled.show()
  
 def show_hrv_screen(mean_hr, mean_ppi, rmssd, sdnn):
@@ -48,11 +60,12 @@ def show_hrv_screen(mean_hr, mean_ppi, rmssd, sdnn):
         sdnn (float): Standard deviation of NN intervals.
     """
     oled.fill(0)
-    oled.text(f"HR: {round(mean_hr)}", 0, 0)
-    oled.text(f"PPI: {round(mean_ppi)}", 0, 10)
-    oled.text(f"RMSSD: {round(rmssd)}", 0, 20)
-    oled.text(f"SDNN: {round(sdnn)}", 0, 30)
-    oled.text("PRESS TO RETURN", 0, 50)
+    text = oled.text
+    text(str(round(mean_hr)), blit_label(_HR, 0, 0), 0)
+    text(str(round(mean_ppi)), blit_label(_PPI, 0, 10), 10)
+    text(str(round(rmssd)), blit_label(_RMSSD, 0, 20), 20)
+    text(str(round(sdnn)), blit_label(_SDNN, 0, 30), 30)
+    blit_label(PRESS_TO_RETURN, 0, 50)
     oled.show()
 
 def show_kubios_results(hr, ppi, rmssd, sdnn, sns, pns):
@@ -74,10 +87,11 @@ def show_kubios_results(hr, ppi, rmssd, sdnn, sns, pns):
         pns (float): Parasympathetic Nervous System index
     """
     oled.fill(0)
-    oled.text(f"HR: {round(hr)}", 0, 0)
-    oled.text(f"PPI: {round(ppi)}", 0, 10)
-    oled.text(f"RMSSD: {round(rmssd)}", 0, 20)
-    oled.text(f"SDNN: {round(sdnn)}", 0, 30)
-    oled.text(f"SNS: {round(sns)}", 0, 40)
-    oled.text(f"PNS: {round(pns)}", 0, 50)
+    text = oled.text
+    text(str(round(hr)), blit_label(_HR, 0, 0), 0)
+    text(str(round(ppi)), blit_label(_PPI, 0, 10), 10)
+    text(str(round(rmssd)), blit_label(_RMSSD, 0, 20), 20)
+    text(str(round(sdnn)), blit_label(_SDNN, 0, 30), 30)
+    text(str(round(sns)), blit_label(_SNS, 0, 40), 40)
+    text(str(round(pns)), blit_label(_PNS, 0, 50), 50)
     oled.show()
@@ -2,19 +2,36 @@ from ui.oled import oled
 import framebuf
 import time
 from ui.menu_icons import menu_icons, ICON_WIDTH, ICON_HEIGHT
+from ui.layout_common import label_tile, blit_label
+
+WELCOME_TEXT = "SaaRi HR Monitor"
+
+# The labels and the welcome text never change, so their centered X
+# positions (8 px per character) are computed once at import instead of on
+# every frame. `WELCOME_X[i - 1]` is the X of the first `i` characters.
+MENU_LABEL_X = {
+    label: (oled.width - len(label) * 8) // 2 for label in menu_icons
+}
+WELCOME_X = tuple(
+    (oled.width - i * 8) // 2 for i in range(1, len(WELCOME_TEXT) + 1)
+)
+
+# Menu labels pre-rendered once (see `ui.layout_common.label_tile`).
+MENU_LABEL_TILES = {label: label_tile(label) for label in menu_icons}
 
 def welcome_screen():
     """
     Display the welcome screen with animated text.
     After animation, proceed to the main menu.
     """
-    welcome_text = "SaaRi HR Monitor"
+    welcome_text = WELCOME_TEXT
+    y = oled.height // 2
     
     oled.fill(0)
     for i in range(1, len(welcome_text)+1):
         oled.fill(0)
         partial = welcome_text[:i]
-        oled.text(partial, (oled.width - len(partial) * 8) // 2, oled.height // 2)
+        oled.text(partial, WELCOME_X[i - 1], y)
         oled.show()
         time.sleep(0.1)  # animation speed (delay between letters)
 
@@ -48,6 +65,11 @@ def show_menu(items, selected_index):
 
     # Draw the label text below the icon
     text_y = ICON_HEIGHT + 10
-    oled.text(selected_label, (oled.width - len(selected_label) * 8) // 2, text_y)
+    x = MENU_LABEL_X.get(selected_label)
+    if x is None:
+        x = (oled.width - len(selected_label) * 8) // 2
+        oled.text(selected_label, x, text_y)
+    else:
+        blit_label(MENU_LABEL_TILES[selected_label], x, text_y)
 
     oled.show()
@@ -11,25 +11,46 @@ Configuration:
 - I2C SDA pin: GPIO14
 - I2C bus: 1
 
+The display object is an `OLED`, an SSD1306_I2C subclass that can also
+push the framebuffer with DMA (`show_async`) so the caller keeps sampling
+while the ~20 ms I2C transfer runs.
+
 Exports:
-    oled (SSD1306_I2C): Global display object for rendering UI
+    oled (OLED): Global display object for rendering UI
+    render_lines(lines, x, y0, dy): Draw several text lines in one pass
 """
 
-from machine import Pin, I2C
+from machine import Pin, I2C, mem32
 from ssd1306 import SSD1306_I2C
+from array import array
+from micropython import const
+import errno
+import framebuf
+import micropython
+import rp2
+import time
+
+# The `_` names are const() and inlined by the compiler inside this module;
+# the public aliases keep `from ui.oled import WIDTH` etc. working.
 
 # --- Display resolution ---
-WIDTH = 128
-HEIGHT = 64
+_WIDTH = const(128)
+_HEIGHT = const(64)
+WIDTH = _WIDTH
+HEIGHT = _HEIGHT
 
 # --- Graph positioning ---
-GRAPH_TOP = 14
-GRAPH_HEIGHT = 50
-GRAPH_BOTTOM = GRAPH_TOP + GRAPH_HEIGHT
+_GRAPH_TOP = const(14)
+_GRAPH_HEIGHT = const(50)
+GRAPH_TOP = _GRAPH_TOP
+GRAPH_HEIGHT = _GRAPH_HEIGHT
+GRAPH_BOTTOM = _GRAPH_TOP + _GRAPH_HEIGHT
 
 # --- Signal ADC range ---
-SIGNAL_MIN = 12000
-SIGNAL_MAX = 40000
+_SIGNAL_MIN = const(12000)
+_SIGNAL_MAX = const(40000)
+SIGNAL_MIN = _SIGNAL_MIN
+SIGNAL_MAX = _SIGNAL_MAX
 
 # --- Visual amplification ---
 GAIN = 2.2
@@ -37,5 +58,211 @@ GAIN = 2.2
 # --- I2C setup ---
 I2C_SCL = 15
 I2C_SDA = 14
-i2c = I2C(1, scl=Pin(I2C_SCL), sda=Pin(I2C_SDA))
-oled = SSD1306_I2C(WIDTH, HEIGHT, i2c)
+I2C_BUS = 1
+i2c = I2C(I2C_BUS, scl=Pin(I2C_SCL), sda=Pin(I2C_SDA))
+
+# --- RP2040 I2C1 registers used for DMA transfers ---
+_I2C1_BASE = const(0x40048000)
+_IC_DATA_CMD = const(_I2C1_BASE + 0x10)
+_IC_STATUS = const(_I2C1_BASE + 0x70)
+_IC_DMA_CR = const(_I2C1_BASE + 0x88)
+_STATUS_TFE = const(0x04)            # TX FIFO empty
+_STATUS_MST_ACTIVITY = const(0x20)   # controller still clocking the bus
+_DMA_CR_TDMAE = const(0x02)          # TX DMA request enable
+_DREQ_I2C1_TX = const(34)
+_CMD_STOP = const(0x200)             # IC_DATA_CMD: issue STOP after this byte
+
+# Longest `OLED.wait` for a DMA transfer (ms). A full frame takes ~20 ms at
+# 400 kHz and ~100 ms at 100 kHz; anything longer means the bus is stuck.
+_WAIT_TIMEOUT_MS = const(250)
+
+
+@micropython.viper
+def _pack(src: ptr8, dst: ptr32, start: int, n: int):
+    """
+    Fill `dst` with the IC_DATA_CMD words for one data transfer: the 0x40
+    control byte, `n` framebuffer bytes from `src[start]`, and STOP on the
+    last one.
+    """
+    dst[0] = 0x40
+    for i in range(n):
+        dst[i + 1] = src[start + i]
+    dst[n] = dst[n] | _CMD_STOP
+
+
+class OLED(SSD1306_I2C):
+    """
+    SSD1306_I2C with a non-blocking `show_async`.
+
+    `show_async` sends the address commands as usual, copies the requested
+    pages into a word backbuffer and lets a DMA channel feed it to the I2C1
+    TX FIFO. Drawing into `buffer` may continue straight away; `busy` is
+    True until the transfer is finished. Every blocking write first waits
+    for a running transfer, so `show()` and the other screens keep working
+    unchanged.
+
+    `show()` itself is replaced by two I2C transactions: the whole address
+    window as one command stream and the framebuffer as one data stream,
+    instead of the driver's six single-command writes plus the data.
+    """
+
+    def __init__(self, width, height, i2c, addr=0x3C):
+        # The base constructor already calls show(), which needs these.
+        # SET_COL_ADDR 0..width-1, SET_PAGE_ADDR start..end (patched).
+        self._window = bytearray((0x21, 0, width - 1, 0x22, 0, height // 8 - 1))
+        self._dma = rp2.DMA()
+        self._ctrl = self._dma.pack_ctrl(size=2, inc_write=False, treq_sel=_DREQ_I2C1_TX)
+        # One IC_DATA_CMD word per byte plus the control byte; built from a
+        # zeroed byte string, so the length is given in bytes.
+        self._back = array("I", bytes(4 * (width * height // 8 + 1)))
+        self._dma_on = False
+        super().__init__(width, height, i2c, addr)
+
+    @property
+    def busy(self):
+        if self._dma.active():
+            return True
+        status = mem32[_IC_STATUS]
+        return not status & _STATUS_TFE or bool(status & _STATUS_MST_ACTIVITY)
+
+    def wait(self):
+        """
+        Block until a running `show_async` transfer has completed.
+
+        Raises OSError(ETIMEDOUT), like a failed blocking I2C write, if the
+        transfer has not finished within `_WAIT_TIMEOUT_MS`; the DMA channel
+        is stopped and its I2C requests disabled first, so the next frame
+        starts from a clean state.
+        """
+        deadline = time.ticks_add(time.ticks_ms(), _WAIT_TIMEOUT_MS)
+        while self.busy:
+            if time.ticks_diff(deadline, time.ticks_ms()) < 0:
+                self._dma.active(0)
+                mem32[_IC_DMA_CR] = 0
+                self._dma_on = False
+                raise OSError(errno.ETIMEDOUT)
+        if self._dma_on:
+            mem32[_IC_DMA_CR] = 0
+            self._dma_on = False
+
+    def write_cmd(self, cmd):
+        self.wait()
+        super().write_cmd(cmd)
+
+    def write_data(self, buf):
+        self.wait()
+        super().write_data(buf)
+
+    def set_window(self, start, end):
+        """
+        Point the panel's write window at pages `start`..`end` over the
+        full width, in a single I2C transaction (control byte 0x00 followed
+        by all six command bytes).
+        """
+        self.wait()
+        window = self._window
+        window[4] = start
+        window[5] = end
+        self.i2c.writeto_mem(self.addr, 0x00, window)
+
+    def show(self):
+        self.set_window(0, self.pages - 1)
+        self.i2c.writeto_mem(self.addr, 0x40, self.buffer)
+
+    def show_async(self, start=0, end=None):
+        """
+        Start sending pages `start`..`end` (default: all) and return.
+
+        Callers should check `busy` first; if a transfer is still running
+        this waits for it.
+        """
+        if end is None:
+            end = self.pages - 1
+        width = self.width
+        self.set_window(start, end)
+
+        # The blocking write above left the I2C target address set to the
+        # display, so the DMA only has to supply the data words.
+        n = (end - start + 1) * width
+        _pack(self.buffer, self._back, start * width, n)
+        mem32[_IC_DMA_CR] = _DMA_CR_TDMAE
+        self._dma_on = True
+        self._dma.config(read=self._back, write=_IC_DATA_CMD, count=n + 1,
+                         ctrl=self._ctrl, trigger=True)
+
+
+oled = OLED(_WIDTH, _HEIGHT, i2c)
+
+# --- Partial updates ---
+# The framebuffer is MONO_VLSB: page p (rows 8p..8p+7) is the WIDTH bytes
+# starting at p * WIDTH, so `oled.show_async(start, end)` can send just a
+# range of pages.
+_PAGE_HEIGHT = const(8)
+PAGE_HEIGHT = _PAGE_HEIGHT
+
+
+# --- Text rendering ---
+# Glyphs of the built-in 8x8 font for ASCII 32..127, rendered once at
+# import. In MONO_VLSB each glyph is 8 column bytes, the same layout as one
+# page of the display, so text can be copied straight into `oled.buffer`.
+_GLYPHS = bytearray(96 * 8)
+_glyph = bytearray(8)
+_glyph_fb = framebuf.FrameBuffer(_glyph, 8, 8, framebuf.MONO_VLSB)
+for _c in range(32, 128):
+    _glyph_fb.fill(0)
+    _glyph_fb.text(chr(_c), 0, 0, 1)
+    _GLYPHS[(_c - 32) * 8:(_c - 31) * 8] = _glyph
+del _glyph, _glyph_fb, _c
+
+# Length, x and y of the line `_draw_text` is drawing.
+_TEXT_PARAMS = array("i", [0, 0, 0])
+
+
+@micropython.viper
+def _draw_text(fb: ptr8, glyphs: ptr8, text: ptr8, params: ptr32):
+    """
+    OR the glyphs of the ASCII string `text` into `fb` at (x, y), clipped to
+    the screen. A line that is not page-aligned is split over two pages.
+    Characters outside 32..127 are drawn as glyph 127, like framebuf.text.
+    """
+    n = params[0]
+    x = params[1]
+    y = params[2]
+    page = y >> 3
+    off = y & 7
+    lo = page * _WIDTH
+    hi = lo + _WIDTH
+    for i in range(n):
+        c = text[i]
+        if c < 32 or c > 127:
+            c = 127
+        g = (c - 32) << 3
+        for col in range(8):
+            px = x + col
+            if px >= _WIDTH:
+                return
+            bits = glyphs[g + col]
+            if page < 8:
+                fb[lo + px] = fb[lo + px] | ((bits << off) & 0xFF)
+            if off != 0 and page < 7:
+                fb[hi + px] = fb[hi + px] | (bits >> (8 - off))
+        x += 8
+
+
+def render_lines(lines, x, y0, dy):
+    """
+    Draw ASCII `lines` at `x`, the first at row `y0` and each next one `dy`
+    rows lower, with the same result as one `oled.text` call per line.
+
+    The whole line is drawn in native code from the pre-rendered glyph
+    table, instead of one glyph call per character.
+    """
+    params = _TEXT_PARAMS
+    params[1] = x
+    fb = oled.buffer
+    y = y0
+    for line in lines:
+        params[0] = len(line)
+        params[2] = y
+        _draw_text(fb, _GLYPHS, line, params)
+        y += dy